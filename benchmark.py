@@ -0,0 +1,259 @@
+"""
+Conferência de paridade e desempenho das rotinas vetorizadas do utils.extract
+contra as implementações originais (frame a frame)
+
+Uso:
+    python benchmark.py paridade [export_sap2000.xlsx]
+    python benchmark.py frame_body [n_linhas] [lim]
+    python benchmark.py superficie [n_pontos]
+
+O modo paridade roda sem supervisão: confere o frame_body e o init_data contra as
+implementações originais em tabelas sintéticas (e no export informado) e sai com
+código 1 na primeira divergência.
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from utils.convert import kn_para_tf
+import utils.extract as extract
+from utils.extract import config, select_top_base, frame_body, init_data
+from utils.superficie import SuperficieInteracao, N_NIVEIS, N_DIRECOES
+
+
+def _extremos_original(df:DataFrame, lim:float) -> DataFrame:
+    '''
+    Implementação original do extremos (um filtro por frame)
+    '''
+    temp = {}
+    for frame in df['Frame'].unique():
+        df_temp = df[df['Frame'] == frame] 
+        temp[frame] = {'max':df_temp[df_temp['Station']<=lim]['Station'].max(), 'min':df_temp['Station'].min()}
+    return pd.DataFrame.from_dict(temp, orient='index')
+
+
+def _frame_body_original(df:DataFrame, lim:float) -> DataFrame:
+    '''
+    Implementação original do frame_body (merge com os extremos de cada frame)
+    '''
+    df_limites = _extremos_original(df, lim)
+    df_limites['Frame'] = df_limites.index
+    df_com_limites = df.merge(df_limites, on='Frame', how='left')
+    df_filtrado = df_com_limites[
+        (df_com_limites['Station'] == df_com_limites['min']) | 
+        (df_com_limites['Station'] == df_com_limites['max'])
+    ]
+    df_filtrado = df_filtrado.drop(columns=['min', 'max'])
+    df_filtrado = df_filtrado.drop_duplicates(subset=['Frame', 'Station', 'M3', 'M2', 'P', 'OutputCase'])
+
+    if lim == 100_000.00:
+        return df_filtrado
+
+    df_filtrado['grupo'] = (df_filtrado['Station'] != df_filtrado['Station'].shift()).cumsum()
+    return df_filtrado.groupby('grupo').agg({
+        'Frame': 'first',
+        'Station': 'first',
+        'P': 'mean', 
+        'M2': 'first',
+        'M3': 'first',
+        'OutputCase': 'first',
+    }).reset_index(drop=True)
+
+
+def _pre_treatment_original(path:str, lim:float):
+    '''
+    Implementação original do pre_treatment
+    '''
+    df = pd.read_excel(path, header=1)
+    kn = df.iloc[0]['P'] == 'KN'
+    df = df.iloc[1:]
+
+    if config['elemento']['L'] == 0:
+        return kn, df
+    return kn, _frame_body_original(df, lim)
+
+
+def _init_data_original(path:str, lim:float=100_000.00) ->tuple[list[tuple[float, float, float, float, float]], list[str], list[str]]:
+    '''
+    Implementação original do init_data (frame a frame, combinação a combinação)
+    '''
+    # Dados
+    esforcos = []
+    combine = []
+    frame = []
+
+    # Instanciando os dados
+    kn, df = _pre_treatment_original(path, lim)
+
+    #Iterando sobre os frames
+    for el_frame in list(df['Frame'].unique()):
+        # Combinações do frame
+        combinacoes = list(df[df['Frame'] == el_frame]['OutputCase'].unique())
+
+        # Iterando nas combinações do frame
+        for combinacao in combinacoes:
+            # Selecionando o elemento
+            df_slice = df[df['Frame'] == el_frame]
+
+            # Selecionado a combinação
+            df_slice = df_slice[df_slice['OutputCase'] == combinacao]
+
+            # Iterando sobre os elementos
+            for i in range(0, df_slice.shape[0], 2):
+                
+                if config['elemento']['L'] == 0:
+                    
+                    try:
+                        for el in [df_slice.iloc[i], df_slice.iloc[i+1]]:
+                            frame.append(el["Frame"])
+                            combine.append(el['OutputCase'])
+                            esforcos.append(kn_para_tf(round(el['P'], 5), round(el['M2'], 5), round(el['M3'], 5), 0, 0) 
+                                            if kn else (round(el['P'], 5), round(el['M2'], 5), round(el['M3'], 5), 0,0))
+                    except Exception as e:
+                        print(f'erro {i}: {e}')
+                        el = df_slice.iloc[i]
+                        frame.append(el["Frame"])
+                        combine.append(el['OutputCase'])
+                        esforcos.append(kn_para_tf(round(el['P'], 5), round(el['M2'], 5), round(el['M3'], 5), 0, 0) 
+                                        if kn else (round(el['P'], 5), round(el['M2'], 5), round(el['M3'], 5), 0,0))
+
+
+                    
+                else:
+                    topo, base = select_top_base(df_slice, i)
+
+                    frame.append(topo["Frame"])
+                    combine.append(topo['OutputCase'])
+                    esforcos.append(kn_para_tf(round(topo['P'], 5), round(topo['M2'], 5), round(topo['M3'], 5), round(base['M2'], 5), round(base['M3'], 5)) 
+                                    if kn else (round(topo['P'], 5), round(topo['M2'], 5), round(topo['M3'], 5), round(base['M2'], 5), round(base['M3'], 5)))
+
+
+    return esforcos, combine, frame
+
+
+
+def tabela_sintetica(n_linhas:int, n_estacoes:int = 5, n_combinacoes:int = 20, seed:int = 0) -> DataFrame:
+    '''
+    Gera uma tabela de esforços no formato do SAP2000 (com object dtype, como no read_excel)
+
+    Parameters
+    ----------
+    n_linhas: quantidade aproximada de linhas
+    n_estacoes: estações por frame
+    n_combinacoes: combinações por frame
+    '''
+    rng = np.random.default_rng(seed)
+    n_frames = max(1, n_linhas//(n_estacoes*n_combinacoes))
+    n = n_frames*n_estacoes*n_combinacoes
+
+    frames = np.repeat(np.arange(n_frames), n_estacoes*n_combinacoes)
+    estacoes = np.tile(np.repeat(np.linspace(0, 3, n_estacoes), n_combinacoes), n_frames)
+    combinacoes = np.tile(np.arange(n_combinacoes), n_frames*n_estacoes)
+
+    return pd.DataFrame({
+        'Frame': frames,
+        'Station': estacoes,
+        'OutputCase': [f'ELU_{c:02d}' for c in combinacoes],
+        'CaseType': 'Combination',
+        'P': np.round(rng.uniform(-500, 50, n), 4),
+        'V2': 1.0,
+        'V3': 2.0,
+        'T': 0.0,
+        'M2': np.round(rng.uniform(-90, 90, n), 6),
+        'M3': np.round(rng.uniform(-90, 90, n), 6),
+    }, index=pd.RangeIndex(1, n + 1)).astype(object)
+
+
+def _cronometrar(funcao, *args):
+    inicio = time.time()
+    resultado = funcao(*args)
+    return resultado, time.time() - inicio
+
+
+def salvar_export(df:DataFrame, path:str):
+    '''
+    Escreve a tabela no layout do export do SAP2000 em kN (título, cabeçalho e linha de unidades)
+    '''
+    unidades = {'Frame': 'Text', 'Station': 'm', 'OutputCase': 'Text', 'CaseType': 'Text',
+                'P': 'KN', 'V2': 'KN', 'V3': 'KN', 'T': 'KN-m', 'M2': 'KN-m', 'M3': 'KN-m'}
+    linha = pd.DataFrame([{coluna: unidades.get(coluna, '') for coluna in df.columns}])
+    pd.concat([linha, df], ignore_index=True).to_excel(path, startrow=1, index=False)
+
+
+def conferir_paridade(caminho:str|None = None, n_linhas:int = 2_000, lims:tuple[float, ...] = (100_000.00, 1.5)):
+    '''
+    Confere as rotinas vetorizadas contra as originais; AssertionError na primeira divergência
+
+    Parameters
+    ----------
+    caminho: export do SAP2000 conferido além das tabelas sintéticas
+    n_linhas: linhas das tabelas sintéticas
+    lims: limites de estação conferidos no frame_body
+    '''
+    for seed in range(3):
+        df = tabela_sintetica(n_linhas, seed=seed)
+        for lim in lims:
+            esperado, obtido = _frame_body_original(df, lim), frame_body(df, lim)
+            assert esperado.equals(obtido), f"frame_body divergente (seed={seed}, lim={lim})"
+        print(f"✅ frame_body: seed {seed}, lims {lims}")
+
+    # O export sintético e o cache do ler_tabela ficam em uma pasta temporária, removida no final
+    pasta_cache = extract.PASTA_CACHE
+    with tempfile.TemporaryDirectory() as pasta:
+        extract.PASTA_CACHE = os.path.join(pasta, 'cache')
+        sintetico = os.path.join(pasta, 'sintetico.xlsx')
+        salvar_export(tabela_sintetica(n_linhas), sintetico)
+        caminhos = [sintetico] + ([caminho] if caminho else [])
+
+        try:
+            for path in caminhos:
+                esperado, t_original = _cronometrar(_init_data_original, path)
+                obtido, t_vetorizado = _cronometrar(init_data, path)
+                for nome, a, b in zip(['esforcos', 'combine', 'frame'], esperado, obtido):
+                    assert list(a) == list(b), f"init_data divergente em {nome} ({len(a)} x {len(b)}): {path}"
+                print(f"✅ init_data: {os.path.basename(path)} ({len(esperado[0])} casos) | "
+                      f"⏱️  Original: {t_original:.2f}s | Vetorizado: {t_vetorizado:.2f}s")
+        finally:
+            extract.PASTA_CACHE = pasta_cache
+
+
+if __name__ == '__main__':
+    modo = sys.argv[1] if len(sys.argv) > 1 else 'frame_body'
+
+    if modo == 'paridade':
+        try:
+            conferir_paridade(sys.argv[2] if len(sys.argv) > 2 else None)
+        except AssertionError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    elif modo == 'frame_body':
+        n_linhas = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+        lim = float(sys.argv[3]) if len(sys.argv) > 3 else 100_000.00
+        df = tabela_sintetica(n_linhas)
+        print(f"📊 Tabela sintética: {len(df)} linhas, {df['Frame'].nunique()} frames")
+
+        obtido, t_vetorizado = _cronometrar(frame_body, df, lim)
+        print(f"⏱️  Vetorizado: {t_vetorizado:.2f}s ({len(obtido)} linhas)")
+
+        esperado, t_original = _cronometrar(_frame_body_original, df, lim)
+        print(f"⏱️  Original: {t_original:.2f}s ({len(esperado)} linhas)")
+        print(f"{'✅ Saídas idênticas' if esperado.equals(obtido) else '❌ Saídas divergentes'} | speedup {t_original/t_vetorizado:.0f}x")
+
+    elif modo == 'superficie':
+        # Superfície sintética (Mr circular, parabólico em N) contra a expressão analítica
+        n_pontos = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+        niveis = np.linspace(-1000, 100, N_NIVEIS)
+        raio = lambda n: np.maximum(200*(1 - ((n + 450)/550)**2), 0)
+        superficie = SuperficieInteracao(niveis, np.repeat(raio(niveis)[:, None], N_DIRECOES, axis=1))
+
+        gerador = np.random.default_rng(0)
+        normal = gerador.uniform(-990, 90, n_pontos)
+        mx, my = gerador.normal(0, 50, n_pontos), gerador.normal(0, 50, n_pontos)
+
+        fs, t_consulta = _cronometrar(superficie.fs, normal, mx, my)
+        erro = np.nanmax(np.abs(fs*np.hypot(mx, my) - raio(normal)))
+        print(f"⏱️  {n_pontos} pontos em {t_consulta:.3f}s | erro máximo de Mr {erro:.3f} tfm")
@@ -1,7 +1,5 @@
 from utils.extract import init_data
-from utils.wapper import PCalcEngine
-from run import run_analysis
-import pandas as pd
+from utils.varredura import varrer, salvar_dim, buscar_armadura_minima
 
 
 def especial_case(value):
@@ -10,41 +8,24 @@ def especial_case(value):
     return value
 
 PATH = r'excel\pILARES ULTIMO.xlsx'
-#esforcos, combine, frame = init_data(PATH)
-engine = PCalcEngine(jar_path=r"engine/pcalc.jar")
 
 bitolas = [10, 12.5, 16, 20, 25, 32]
 quantidades = range(4,50)
-esforco = (-316.8816	,66.37991	,75.89921	,-7.35069	,129.33481)
-
-
-
-saida = {'n':quantidades}
-for quantidade in quantidades:
-    for barra in bitolas:
-        print(f'Barra: {barra}, Quantidade: {quantidade}')
-        fs, _, _, _ = run_analysis(engine, [esforco], barra, (quantidade, 0))
-
-        if barra not in saida.keys():
-            print(fs[0])
-            minimo = min(fs[0])
-            print(minimo)
-            saida[barra] = [minimo]
-        else:
-            print(fs[0])
-            minimo = min(fs[0])
-            print(minimo)
-
-            saida[barra].append(minimo)
-    print('-'*70)
-
-df = pd.DataFrame(saida)
-df_com_indice = df.set_index('n')
-df_com_indice.to_excel(f'DIM-{PATH.replace('.xlsx', '').split('\\')[-1]}.xlsx')
-
-
-
+BUSCA = False  # True: busca a armadura mínima por bissecção em vez de varrer a grade inteira
+POR_AREA = False  # Na busca, bissecção prévia sobre a área de aço que limita a busca por diâmetro
 
+# Casos varridos de uma vez (ex.: todas as combinações de uma coluna do init_data)
+#esforcos, combine, frame = init_data(PATH)
+esforcos = [(-316.8816	,66.37991	,75.89921	,-7.35069	,129.33481)]
 
 
+if __name__ == '__main__':
+    if BUSCA:
+        melhor, _ = buscar_armadura_minima(esforcos, bitolas, quantidades, por_area=POR_AREA)
+        print(f"Armadura mínima: {melhor}" if melhor else "Nenhuma armadura da grade verifica todos os casos")
+    else:
+        # Grade quantidade x bitola distribuída entre os workers residentes
+        tabela = varrer(esforcos, bitolas, quantidades)
+        print(tabela)
 
+        print(f"Tabela salva: {salvar_dim(tabela, PATH)}")
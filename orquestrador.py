@@ -1,92 +1,91 @@
-import subprocess
 import time
-import json
 import os
-from utils.extract import init_data
-from utils.preparation import preparar_lotes
-from utils.output import create_xlsx
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.extract import init_data, config
+from utils.preparation import dividir_lotes, preparar_lotes_streaming, deduplicar_lotes, filtrar_armazenados
+from utils.output import create_xlsx, exportar_falhas
 from utils.pos_processing import clear_folder
+from utils.armazem import ArmazemResultados, chave_caso
+from utils.incremental import filtrar_inalterados
+from utils.triagem import carregar_triagem, triar_lotes, relatorio_triagem
+from utils.superficie import carregar_superficie, resolver_lotes
+from utils.custos import ModeloCusto, balancear_lotes
+from utils.prazos import PoliticaPrazos, TIMEOUT_CASO, timeouts_repeticao
+from utils.chaves import chave_armadura
+from utils.persistencia import PASTA_CACHE
+from utils.servidor_engine import PoolEngines
+from utils.execucao import executar_lotes, executar_dinamico, consolidar_resultados
+from worker import ARMADURA, FATORES_REPETICAO, repetir_caso
 
 
-def executar_lote(lote_id, lote_data, timeout=300):
+def registrar_lotes(lotes, destino):
     """
-    Executa um lote em subprocess e aguarda finalização
+    Repassa os lotes de um gerador guardando cada um em destino (dados da planilha final)
     """
-    # Salva dados do lote em arquivo JSON temporário
-    lote_file = f'lote_{lote_id}.json'
-    with open(lote_file, 'w') as f:
-        json.dump(lote_data, f)
-    
-    print(f"\n{'='*70}")
-    print(f"   LOTE {lote_id + 1} - Iniciando subprocess")
-    print(f"   Índices: {lote_data['indices'][0]} a {lote_data['indices'][-1]}")
-    print(f"   Total de cálculos: {len(lote_data['esforcos'])}")
-    print(f"{'='*70}\n")
-    
-    inicio = time.time()
-    
-    try:
-        # Executa o worker em subprocess
-        resultado = subprocess.run(
-            ['python', 'worker.py', lote_file],
-            timeout=timeout,
-            capture_output=True,
-            text=True
-        )
-        
-        tempo_decorrido = time.time() - inicio
-        
-        # Verifica resultado
-        if resultado.returncode == 0:
-            print(f"\n LOTE {lote_id + 1} - SUCESSO ({tempo_decorrido:.1f}s)")
-            
-            # Lê resultados
-            resultado_file = f'resultado_{lote_id}.json'
-            if os.path.exists(resultado_file):
-                with open(resultado_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                print(f"⚠️  Arquivo de resultado não encontrado")
-                return None
-        else:
-            print(f"\n LOTE {lote_id + 1} - FALHOU (código: {resultado.returncode})")
-            print(f"STDOUT: {resultado.stdout}")
-            print(f"STDERR: {resultado.stderr}")
-            return None
-            
-    except subprocess.TimeoutExpired:
-        print(f"\n LOTE {lote_id + 1} - TIMEOUT ({timeout}s)")
-        return None
-        
-    except Exception as e:
-        print(f"\n LOTE {lote_id + 1} - ERRO: {e}")
-        return None
-    
-    finally:
-        # Limpa arquivo temporário do lote
-        if os.path.exists(lote_file):
-            os.remove(lote_file)
+    for lote in lotes:
+        destino.append(lote)
+        yield lote
 
 
-def consolidar_resultados(resultados_lotes):
+def repetir_falhas(resultado_final, esforcos, armadura=ARMADURA, n_processos=None, armazem=None, prazos=None):
     """
-    Consolida resultados de todos os lotes
+    Fila de repetição: recalcula ao final da execução cada caso que falhou, isolado em uma JVM nova
+
+    Casos com os mesmos esforços são recalculados uma única vez. Os casos recuperados
+    passam a sucessos em resultado_final (e são gravados no armazém); os demais
+    são devolvidos com as tentativas e as listas de erro do engine.
+
+    Parameters
+    ----------
+    resultado_final: saída do consolidar_resultados (atualizada aqui)
+    esforcos: esforços de todos os casos, na ordem de resultado_final['indices']
+    prazos: PoliticaPrazos de onde vem o prazo por caso da seção (FATORES_REPETICAO);
+    sem ela, o prazo é o TIMEOUT_CASO. A soma dos timeouts de um caso é limitada
+    a TEMPO_REPETICAO (timeouts_repeticao)
+
+    Returns
+    -------
+    Índice → tentativas (repetir_caso) dos casos que seguem falhando
     """
-    fs_total = []
-    sucessos_total = []
-    falhas_total = []
-    
-    for resultado in resultados_lotes:
-        if resultado:
-            fs_total.extend(resultado.get('fs', []))
-            sucessos_total.extend(resultado.get('sucessos', []))
-            falhas_total.extend(resultado.get('falhas', []))
-    
-    return {
-        'fs': fs_total,
-        'sucessos': sucessos_total,
-        'falhas': falhas_total
-    }
+    n_processos = n_processos or os.cpu_count() or 1
+    secao = chave_armadura(config, armadura)
+    prazo = prazos.prazo_caso(secao) if prazos is not None else TIMEOUT_CASO
+    timeouts = timeouts_repeticao(prazo, FATORES_REPETICAO)
+
+    # Posição de cada índice nas listas de resultado_final e de esforcos
+    posicao = {indice: i for i, indice in enumerate(resultado_final['indices'])}
+
+    indices_por_esforco = {}
+    for indice in resultado_final['falhas']:
+        indices_por_esforco.setdefault(tuple(esforcos[posicao[indice]]), []).append(indice)
+
+    if not indices_por_esforco:
+        return {}
+
+    print(f"🔁 Repetindo {len(indices_por_esforco)} casos que falharam, um por engine (timeouts {timeouts}s)...")
+    sem_solucao = {}
+    recuperados = set()
+
+    with ThreadPoolExecutor(max_workers=n_processos) as pool:
+        futuros = {pool.submit(repetir_caso, list(esforco), armadura, timeouts): esforco for esforco in indices_por_esforco}
+        for futuro in as_completed(futuros):
+            esforco = futuros[futuro]
+            repeticao = futuro.result()
+
+            for indice in indices_por_esforco[esforco]:
+                if repeticao['fs'] is None:
+                    sem_solucao[indice] = repeticao['tentativas']
+                else:
+                    resultado_final['fs'][posicao[indice]] = repeticao['fs']
+                    recuperados.add(indice)
+
+            if repeticao['fs'] is not None and armazem is not None:
+                armazem.gravar({chave_caso(secao, esforco): repeticao['fs']})
+
+    resultado_final['sucessos'] = sorted(resultado_final['sucessos'] + list(recuperados))
+    resultado_final['falhas'] = sorted(sem_solucao)
+    print(f"🔁 Repetição: {len(recuperados)} casos recuperados, {len(sem_solucao)} seguem falhando")
+    return sem_solucao
 
 
 # =============================================================================
@@ -101,47 +100,145 @@ if __name__ == '__main__':
     PATH = r'excel\pILARES ULTIMO.xlsx'
     LIM = 100_000
     TAMANHO_LOTE = 100  # Ajuste conforme necessário
+    N_PROCESSOS = os.cpu_count()  # Workers simultâneos
+    MAX_CASOS_WORKER = 5_000  # Casos até reciclar um worker residente
+    STREAMING = True  # Lê o Excel em fluxo (memória limitada, lotes despachados durante a leitura)
+    ARMAZEM = 'resultados.sqlite'  # Resultados persistentes: execuções interrompidas retomam de onde pararam
+    MODELO = 'pilares'  # Nome do modelo: a execução incremental compara com a última de mesmo nome
+    INCREMENTAL = True  # Calcula apenas as linhas (frame, combinação) alteradas desde a última execução
+    TRIAGEM = False  # Classifica pelas curvas Mr em cache os casos longe da superfície de interação, sem o engine
+    VALIDAR_TRIAGEM = False  # Calcula também os casos triados e gera o relatório triagem x exato
+    SUPERFICIE = False  # Seção única (elemento.L = 0): FS pela superfície de interação da seção, sem o engine
+    BALANCEAR = True  # Lotes com o mesmo tempo previsto (custos das execuções anteriores) em vez da mesma quantidade
+    CUSTOS = os.path.join(PASTA_CACHE, 'custos.json')  # Tempos por caso aprendidos entre execuções
+    PRAZOS = os.path.join(PASTA_CACHE, 'prazos.json')  # Latências por seção/método que definem os timeouts de casos e lotes
+    DINAMICO = True  # Workers pegam pequenos pedaços de uma fila compartilhada em vez de lotes fixos
+    SERVIDOR = False  # Engines em servidores locais (socket) chamados pelo orquestrador, sem worker.py (ignora DINAMICO)
+    REPETIR_FALHAS = True  # Recalcula as falhas ao final, cada caso em uma JVM nova com timeout crescente
 
-    # Prepara lotes
+    # Prepara lotes (o Excel é lido uma única vez; os dados são reutilizados na planilha final)
+    lotes_lidos = []
     
-    print(f"📦 Preparando lotes de {TAMANHO_LOTE} cálculos...")
-    lotes = preparar_lotes(PATH, tamanho_lote=TAMANHO_LOTE)
-    print(f"✓ {len(lotes)} lotes preparados - total de {len(lotes)*TAMANHO_LOTE}\n")
+    if STREAMING:
+        # Os lotes são despachados durante a leitura do Excel
+        print(f"📦 Lendo o Excel em fluxo, lotes de {TAMANHO_LOTE} cálculos...")
+        lotes = registrar_lotes(preparar_lotes_streaming(PATH, tamanho_lote=TAMANHO_LOTE), lotes_lidos)
+    else:
+        print(f"📦 Preparando lotes de {TAMANHO_LOTE} cálculos...")
+        esforcos, combine, frame = init_data(PATH)
+        lotes = dividir_lotes(esforcos, combine, frame, tamanho_lote=TAMANHO_LOTE)
+        print(f"✓ {len(lotes)} lotes preparados - total de {len(lotes)*TAMANHO_LOTE}\n")
+
+    armazem = ArmazemResultados(ARMAZEM)
+    secao = chave_armadura(config, ARMADURA)
+
+    # Linhas com os mesmos esforços da última execução do modelo reaproveitam o FS
+    inalterados = {}
+    if INCREMENTAL:
+        anterior = armazem.carregar_execucao(MODELO, secao)
+        print(f"🔁 Execução anterior de {MODELO}: {len(anterior)} linhas")
+        lotes = filtrar_inalterados(lotes, anterior, inalterados)
+
+    # Casos já calculados em execuções anteriores são lidos do armazém
+    reaproveitados = {}
+    lotes = filtrar_armazenados(lotes, armazem, ARMADURA, reaproveitados)
+
+    # Casos com grande margem (a favor ou contra) são classificados pelo FS de 1ª ordem
+    triados = {}
+    if TRIAGEM:
+        triagem = carregar_triagem(config, ARMADURA)
+        if triagem is not None:
+            lotes = triar_lotes(lotes, triagem, triados, calcular_triados=VALIDAR_TRIAGEM)
+
+    # Sem 2ª ordem (L = 0) o FS de 1ª ordem da superfície de interação substitui o engine
+    pela_superficie = {}
+    if SUPERFICIE and config['elemento']['L'] == 0:
+        superficie = carregar_superficie(config, ARMADURA)
+        if superficie is not None:
+            lotes = resolver_lotes(lotes, superficie, pela_superficie)
+
+    # Esforços idênticos na mesma seção são calculados uma única vez
+    duplicatas = {}
+    lotes = deduplicar_lotes(lotes, duplicatas, ARMADURA, tamanho_lote=TAMANHO_LOTE)
+
+    # Casos lentos (2ª ordem, frames que travam) distribuídos por tempo previsto entre os lotes
+    custos = ModeloCusto(config, CUSTOS)
+    if BALANCEAR:
+        lotes = balancear_lotes(lotes, custos, N_PROCESSOS, tamanho_lote=TAMANHO_LOTE)
+
+    # Timeouts por caso e por lote a partir das latências observadas da seção
+    prazos = PoliticaPrazos(config, PRAZOS)
+    lotes = prazos.aplicar(lotes)
     
-    # Executa lotes sequencialmente
+    # Executa lotes em paralelo
+    print(f"🚀 Executando com {N_PROCESSOS} workers em paralelo...")
     inicio_total = time.time()
-    resultados_lotes = []
-
-    #retry =[12]
-    #for i, lote in enumerate(lotes):
-    for i, lote in enumerate(lotes):
-        #i = retry[i] - 1
-        #lote = lotes[i]
-        resultado = executar_lote(i, lote, timeout=500)  
-        resultados_lotes.append(resultado)
-        
-        # Pequena pausa entre lotes
-        if i < len(lotes) - 1:
-            print("\n⏸️  Pausa antes do próximo lote...")
-            time.sleep(0.5)
+    if SERVIDOR:
+        servidores = PoolEngines(N_PROCESSOS)
+        try:
+            resultados_lotes = executar_lotes(lotes, n_processos=N_PROCESSOS, armazem=armazem, custos=custos, prazos=prazos, servidores=servidores)
+        finally:
+            servidores.encerrar()
+    elif DINAMICO:
+        resultados_lotes = executar_dinamico(lotes, n_processos=N_PROCESSOS, max_casos=MAX_CASOS_WORKER, armazem=armazem, custos=custos, prazos=prazos)
+    else:
+        resultados_lotes = executar_lotes(lotes, n_processos=N_PROCESSOS, max_casos=MAX_CASOS_WORKER, armazem=armazem, custos=custos, prazos=prazos)
     
     tempo_total = time.time() - inicio_total
+    print(f"⏱️  Tempo total: {tempo_total:.1f}s")
+    custos.salvar()
+    prazos.salvar()
     
     # Consolida resultados
     print("="*70)
     
-    resultado_final = consolidar_resultados(resultados_lotes)
+    fs_triados = {} if VALIDAR_TRIAGEM else {indice: fs for indice, (_, fs) in triados.items()}
+    resultado_final = consolidar_resultados(resultados_lotes, duplicatas, {**inalterados, **reaproveitados, **pela_superficie, **fs_triados})
+    total_casos = len(resultado_final['fs'])
     
     print(f"\n✅ Sucessos: {len(resultado_final['sucessos'])}")
     print(f"❌ Falhas: {len(resultado_final['falhas'])}")
+    print(f"🗂️  Cache de seções: {resultado_final['cache']['hits']} hits / {resultado_final['cache']['misses']} misses")
+    if INCREMENTAL:
+        print(f"🔁 Incremental: {len(inalterados)} linhas inalteradas, {total_casos - len(inalterados)} alteradas ou novas")
+    if TRIAGEM:
+        print(f"🔬 Triagem: {len(triados)} de {total_casos} casos classificados sem o engine")
+    if pela_superficie:
+        print(f"🧭 Superfície de interação: {len(pela_superficie)} de {total_casos} casos calculados sem o engine")
+    print(f"💾 Armazém: {len(reaproveitados)} de {total_casos} casos reaproveitados de execuções anteriores")
+    print(f"♻️  Deduplicação: {resultado_final['deduplicados']} de {total_casos} casos reaproveitados ({resultado_final['deduplicados']/max(total_casos, 1):.1%})")
     
+    if STREAMING:
+        esforcos = [esforco for lote in lotes_lidos for esforco in lote['esforcos']]
+        combine = [combinacao for lote in lotes_lidos for combinacao in lote['combine']]
+        frame = [el for lote in lotes_lidos for el in lote['frame']]
+
+    # Falhas recalculadas isoladamente; as que persistem são relatadas com os erros do engine
+    sem_solucao = {}
+    if REPETIR_FALHAS:
+        sem_solucao = repetir_falhas(resultado_final, esforcos, ARMADURA, n_processos=N_PROCESSOS, armazem=armazem, prazos=prazos)
+
     # Gera planilha final
     print("\n📄 Gerando planilha final...")
 
-    # Reconstrói dados completos
-    esforcos, combine, frame = init_data(PATH)
-    create_xlsx(resultado_final['fs'], frame=frame, combine=combine, esforcos=esforcos, name=PATH.replace('.xlsx', '').split('\\')[-1])
+    nome = PATH.replace('.xlsx', '').split('\\')[-1]
+    classes_triagem = [triados[i][0] if i in triados else '' for i in resultado_final['indices']] if TRIAGEM else None
+    create_xlsx(resultado_final['fs'], frame=frame, combine=combine, esforcos=esforcos, name=nome, triagem=classes_triagem)
     clear_folder()
 
+    if VALIDAR_TRIAGEM:
+        relatorio_triagem(triados, resultado_final['fs'], name=nome, indices=resultado_final['indices'])
+
+    if sem_solucao:
+        print(f"⚠️  Falhas detalhadas em {exportar_falhas(sem_solucao, frame, combine, esforcos, name=nome, indices=resultado_final['indices'])}")
+
+    # Guarda a tabela desta execução para a próxima execução incremental (FS da triagem e da superfície não são reaproveitados)
+    fs_execucao = [
+        ['triagem'] if i in fs_triados else ['superficie'] if i in pela_superficie else fs
+        for i, fs in zip(resultado_final['indices'], resultado_final['fs'])
+    ]
+    armazem.salvar_execucao(MODELO, secao, frame, combine, esforcos, fs_execucao)
+    armazem.fechar()
+
     print("✅ PROCESSAMENTO COMPLETO!")
     print("="*70)
@@ -1,78 +1,88 @@
 
-from utils.wapper import PCalcEngine
-from utils.misc import matar_java_travado
+from utils.engine_processo import EngineProcesso
 from utils.output import create_xlsx
-from utils.extract import init_data
+from utils.extract import init_data, config
+from utils.chaves import chave_armadura
+from utils.prazos import PoliticaPrazos
 from utils.plot import plot_situation
-from threading import Thread
-import time
+from utils.blocos import dividir_em_blocos, dividir_bloco, calcular_bloco, bloco_valido
+from collections import deque
 import sys
 import psutil
 from datetime import datetime
 
 
-def run_analysis(engine, esforcos, diametro_mm, barras:tuple[int, int] = (16, 0)):
+def run_analysis(engine, esforcos, diametro_mm, barras:tuple[int, int] = (16, 0), tamanho_bloco:int = 20, prazos:PoliticaPrazos|None = None):
     # Seu loop modificado:
     sucessos = []
     falhas = []
-    fs = []
+    fs = [None]*len(esforcos)
 
     plot = {'curvas_mr':[], 'esforco':[]}
+    curvas = [None]*len(esforcos)
 
     nx, ny = barras 
+    armadura = {'diametro_mm': diametro_mm, 'nx': nx, 'ny': ny, 'd_linha': 8, 'n_barras': nx}
+
+    # Timeout por combinação aprendido das latências da seção (50 s sem política)
+    secao = chave_armadura(config, armadura)
+    timeout_caso = prazos.prazo_caso(secao) if prazos is not None else 50
+
+    # Blocos de combinações calculados em uma única passada do engine
+    pendentes = deque(dividir_em_blocos(list(range(len(esforcos))), list(esforcos), tamanho_bloco))
 
     with open('log.txt', 'a', encoding='utf-8', buffering=1) as arquivo:     
-        for i, el in enumerate(esforcos):
-            resultado_container = [None]
-            
-            def executar():
-                resultado_container[0] = engine.calcular_envoltoria(
-                    diametro_mm=diametro_mm,
-                    nx=nx, ny=ny,
-                    d_linha=8,
-                    n_barras=nx,
-                    esforcos=[el]
-                )
+        while pendentes:
+            bloco_indices, bloco_esforcos = pendentes.popleft()
             
-            thread = Thread(target=executar)
-            thread.daemon = True
-            thread.start()
-            thread.join(timeout=50)
+            resultado, travou, tempo = calcular_bloco(engine, bloco_esforcos, timeout_caso,
+                                               detalhe='fs+curva',
+                                               **armadura)
             
-            resultado = resultado_container[0]
-            
-            if resultado and resultado.get('sucesso'):
-                print(f"✓ Iteração {i} concluída - {datetime.now()}")
-                arquivo.write(f"✓ Iteração {i} concluída - {datetime.now()}\n")
-                arquivo.flush()
-                fs.append(resultado_container[0]['fs_por_combinacao'][0])
-                plot['curvas_mr'].append(resultado['curvas_mr'])
-                plot['esforco'].append(el)
-                sucessos.append(i)
+            if bloco_valido(resultado, travou, len(bloco_esforcos)):
+                if prazos is not None:
+                    prazos.observar(secao, [tempo/len(bloco_indices)]*len(bloco_indices))
+                for j, i in enumerate(bloco_indices):
+                    print(f"✓ Iteração {i} concluída - {datetime.now()}")
+                    arquivo.write(f"✓ Iteração {i} concluída - {datetime.now()}\n")
+                    arquivo.flush()
+                    fs[i] = resultado['fs_por_combinacao'][j]
+                    curvas[i] = resultado['curvas_mr_por_combinacao'][j]
+                    sucessos.append(i)
             else:
-                print(f"⚠️  Iteração {i} travou - matando Java e pulando...")
-                fs.append(['falhou']*11)
-                del engine
-                engine = PCalcEngine(jar_path="pcalc.jar")
-                matar_java_travado()
-                falhas.append(i)
-                time.sleep(2)  # Aguarda processo morrer
+                if len(bloco_indices) > 1:
+                    print(f"⚠️  Bloco {bloco_indices[0]}-{bloco_indices[-1]} travou - reiniciando engine e dividindo...")
+                    pendentes.extendleft(reversed(dividir_bloco(bloco_indices, bloco_esforcos)))
+                else:
+                    print(f"⚠️  Iteração {bloco_indices[0]} travou - reiniciando engine e pulando...")
+                    fs[bloco_indices[0]] = ['falhou']*11
+                    falhas.append(bloco_indices[0])
+                # Substitui apenas o processo (e a JVM) deste engine
+                engine.reiniciar()
                 sys.stdout.flush()
     
-    return fs, sucessos, falhas, plot
+    # Dados para o gráfico na ordem original
+    for i in sorted(sucessos):
+        plot['curvas_mr'].append(curvas[i])
+        plot['esforco'].append(esforcos[i])
+    
+    return fs, sorted(sucessos), sorted(falhas), plot
 
 if __name__ == '__main__':
 
-    # Inicializa o engine
-    engine = PCalcEngine(jar_path=r"engine/pcalc.jar")
+    # Inicializa o engine (JVM em um processo filho vigiado)
+    engine = EngineProcesso(jar_path=r"engine/pcalc.jar")
+    prazos = PoliticaPrazos(config)
 
     print("-" * 70)
 
     esforcos, combine, frame = init_data(r'excel\Pilares 07.11.xlsx')
     print(esforcos)
-    fs, sucessos, falhas, resultado = run_analysis(engine, [esforcos[3]], 16, (8, 0))
+    fs, sucessos, falhas, resultado = run_analysis(engine, [esforcos[3]], 16, (8, 0), prazos=prazos)
+    prazos.salvar()
 
     print(f"\nSucessos: {len(sucessos)} | Falhas: {len(falhas)}")
     print(fs)
+    engine.encerrar()
     #create_xlsx(fs, frame=frame[:80], combine=combine[:80], esforcos=esforcos[:80])
     #plot_situation(resultado['curvas_mr'], resultado['esforco'])
\ No newline at end of file
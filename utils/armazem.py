@@ -0,0 +1,134 @@
+import json
+import sqlite3
+import time
+from utils.chaves import _hash
+
+
+def chave_caso(secao:str, esforco) -> str:
+    '''
+    Chave de um caso: seção armada (chave_secao/chave_armadura) e esforços
+
+    Parameters
+    ----------
+    secao: chave da seção armada
+    esforco: (N, Mx_topo, My_topo, Mx_base, My_base)
+    '''
+    return _hash([secao, [float(valor) for valor in esforco]])
+
+
+class ArmazemResultados:
+    '''
+    Armazém persistente (SQLite) dos FS já calculados, indexado pela chave do caso.
+
+    Os resultados são gravados a cada lote concluído; uma execução interrompida
+    retoma de onde parou e casos já calculados nunca são recalculados.
+    '''
+
+    def __init__(self, caminho:str = 'resultados.sqlite'):
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.execute(
+            'CREATE TABLE IF NOT EXISTS resultados (chave TEXT PRIMARY KEY, fs TEXT NOT NULL, gravado REAL NOT NULL)'
+        )
+        self.conexao.execute(
+            'CREATE TABLE IF NOT EXISTS execucoes (nome TEXT NOT NULL, secao TEXT NOT NULL, frame TEXT NOT NULL, '
+            'combinacao TEXT NOT NULL, ordinal INTEGER NOT NULL, esforco TEXT NOT NULL, fs TEXT NOT NULL)'
+        )
+        self.conexao.commit()
+
+    def buscar(self, chaves:list[str]) -> dict[str, list]:
+        '''
+        Retorna os FS armazenados para as chaves informadas (as ausentes são omitidas)
+        '''
+        encontrados = {}
+        chaves = list(chaves)
+
+        # Consultas em partes para respeitar o limite de parâmetros do SQLite
+        for i in range(0, len(chaves), 500):
+            parte = chaves[i:i+500]
+            cursor = self.conexao.execute(
+                f"SELECT chave, fs FROM resultados WHERE chave IN ({','.join('?'*len(parte))})", parte
+            )
+            encontrados.update((chave, json.loads(fs)) for chave, fs in cursor)
+
+        return encontrados
+
+    def gravar(self, registros:dict[str, list]) -> None:
+        '''
+        Grava (ou substitui) os FS de um conjunto de casos em uma única transação
+
+        Parameters
+        ----------
+        registros: chave do caso → lista de FS
+        '''
+        agora = time.time()
+        with self.conexao:
+            self.conexao.executemany(
+                'INSERT OR REPLACE INTO resultados (chave, fs, gravado) VALUES (?, ?, ?)',
+                [(chave, json.dumps(fs), agora) for chave, fs in registros.items()]
+            )
+
+    def gravar_lote(self, lote_data:dict, resultado:dict) -> None:
+        '''
+        Grava os casos calculados com sucesso de um lote (com a chave 'secao' do deduplicar_lotes)
+        '''
+        secao = lote_data['secao']
+        esforco_por_indice = dict(zip(lote_data['indices'], lote_data['esforcos']))
+        fs_por_indice = dict(zip(resultado['indices'], resultado['fs']))
+
+        self.gravar({
+            chave_caso(secao, esforco_por_indice[i]): fs_por_indice[i]
+            for i in resultado.get('sucessos', [])
+        })
+
+    def salvar_execucao(self, nome:str, secao:str, frame:list, combine:list, esforcos:list, fs:list) -> None:
+        '''
+        Guarda a tabela de entrada e os FS de uma execução, substituindo a anterior de mesmo nome
+
+        Parameters
+        ----------
+        nome: nome do modelo (as execuções incrementais comparam com a última de mesmo nome)
+        secao: chave da seção armada da execução
+        frame, combine, esforcos: saída do init_data
+        fs: FS de cada caso (consolidar_resultados)
+        '''
+        ordinais = {}
+        linhas = []
+        for el_frame, combinacao, esforco, el_fs in zip(frame, combine, esforcos, fs):
+            ordinal = ordinais.get((el_frame, combinacao), 0)
+            ordinais[(el_frame, combinacao)] = ordinal + 1
+            linhas.append((nome, secao, json.dumps(el_frame), json.dumps(combinacao), ordinal, json.dumps(esforco), json.dumps(el_fs)))
+
+        with self.conexao:
+            self.conexao.execute('DELETE FROM execucoes WHERE nome = ?', (nome,))
+            self.conexao.executemany('INSERT INTO execucoes VALUES (?, ?, ?, ?, ?, ?, ?)', linhas)
+
+    def carregar_execucao(self, nome:str, secao:str) -> dict[tuple, tuple]:
+        '''
+        Carrega a última execução de mesmo nome e seção
+
+        Returns
+        -------
+        (frame, combinação, ordinal) → (esforço, FS); vazio se não houver execução com a mesma seção
+        '''
+        cursor = self.conexao.execute(
+            'SELECT frame, combinacao, ordinal, esforco, fs FROM execucoes WHERE nome = ? AND secao = ?', (nome, secao)
+        )
+        return {
+            (json.loads(frame), json.loads(combinacao), ordinal): (tuple(json.loads(esforco)), json.loads(fs))
+            for frame, combinacao, ordinal, esforco, fs in cursor
+        }
+
+    def secao_execucao(self, nome:str) -> str|None:
+        '''
+        Chave da seção armada da última execução de mesmo nome (None se não houver)
+        '''
+        linha = self.conexao.execute('SELECT secao FROM execucoes WHERE nome = ? LIMIT 1', (nome,)).fetchone()
+        return linha[0] if linha else None
+
+    def __len__(self) -> int:
+        return self.conexao.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+
+    def fechar(self):
+        self.conexao.close()
@@ -0,0 +1,71 @@
+import time
+
+TAMANHO_BLOCO = 20  # Combinações enviadas ao engine por chamada
+
+
+def dividir_em_blocos(indices:list[int], esforcos:list[tuple], tamanho_bloco:int) -> list[tuple[list[int], list[tuple]]]:
+    '''
+    Divide as combinações em blocos (índices, esforços) mantendo a ordem original
+
+    Parameters
+    ----------
+    indices: índices originais das combinações
+    esforcos: lista com os esforços das combinações
+    tamanho_bloco: quantidade de combinações por chamada ao engine
+    '''
+    return [(indices[i:i+tamanho_bloco], esforcos[i:i+tamanho_bloco]) for i in range(0, len(esforcos), tamanho_bloco)]
+
+
+def dividir_bloco(indices:list[int], esforcos:list[tuple]) -> list[tuple[list[int], list[tuple]]]:
+    '''
+    Divide um bloco que falhou ao meio para ser recalculado
+
+    Parameters
+    ----------
+    indices: índices originais das combinações do bloco
+    esforcos: esforços das combinações do bloco
+    '''
+    meio = len(indices)//2
+    return [(indices[:meio], esforcos[:meio]), (indices[meio:], esforcos[meio:])]
+
+
+def calcular_bloco(engine, esforcos:list[tuple], timeout:float, **armadura):
+    '''
+    Calcula um bloco de combinações em uma única passada do engine (timeout rígido)
+
+    O prazo é vigiado pelo engine, que mata apenas o seu processo em um
+    travamento; nenhuma thread é criada por bloco.
+
+    Parameters
+    ----------
+    engine: EngineProcesso ou ClienteEngine
+    esforcos: combinações do bloco (N, Mx_topo, My_topo, Mx_base, My_base)
+    timeout: tempo máximo por combinação (s)
+    armadura: argumentos de armadura repassados ao calcular_envoltoria
+
+    Returns
+    -------
+    Tupla com o resultado do engine (None em caso de erro), se o cálculo travou e o
+    tempo da chamada (s), sem a inicialização da JVM
+    '''
+    inicio = time.time()
+    try:
+        engine.preparar()
+        inicio = time.time()
+        # O timeout do bloco cresce com a quantidade de combinações
+        resultado = engine.calcular_envoltoria(timeout=timeout*len(esforcos), esforcos=esforcos, **armadura)
+        return resultado, False, time.time() - inicio
+    except TimeoutError:
+        return None, True, time.time() - inicio
+    except RuntimeError as e:
+        print(f"\n    ERRO no engine: {e}")
+        return None, False, time.time() - inicio
+
+
+def bloco_valido(resultado, travou:bool, n_comb:int) -> bool:
+    '''
+    Verifica se o engine devolveu um FS para cada combinação do bloco
+    '''
+    if travou or not resultado or not resultado.get('sucesso'):
+        return False
+    return len(resultado.get('fs_por_combinacao', [])) == n_comb
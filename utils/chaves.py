@@ -0,0 +1,68 @@
+import hashlib
+import json
+
+
+def _hash(dados) -> str:
+    '''
+    Gera um hash canônico (independente da ordem das chaves) de uma estrutura serializável
+    '''
+    texto = json.dumps(dados, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+def segunda_ordem(config:dict) -> bool:
+    '''
+    Se o config calcula a 2ª ordem (method.2_ordem 4/5 em uma barra, L > 0)
+    '''
+    return config['elemento']['L'] > 0 and config['method']['2_ordem'] in (4, 5)
+
+
+def chave_secao(config:dict, diametro_mm:float, nx:int, ny:int, n_barras:int|None, d_linha:float) -> str:
+    '''
+    Chave da seção armada: materiais, coeficientes, método, geometria e armadura
+
+    Parameters
+    ----------
+    config: configuração carregada do config.yaml
+    diametro_mm: diâmetro das barras (mm)
+    nx: número de barras no lado horizontal (retangular)
+    ny: número de barras no lado vertical (retangular)
+    n_barras: número de barras (circular)
+    d_linha: distância do CG da barra à face (cm)
+    '''
+    tipo_secao = config['elemento']['secao']['tipo_secao'].lower()
+
+    # Normalizando a disposição das barras para que chamadas equivalentes tenham a mesma chave
+    if 'circular' in tipo_secao:
+        disposicao = {'n_barras': n_barras if n_barras else nx}
+    else:
+        disposicao = {'nx': nx, 'ny': ny}
+
+    return _hash({
+        'materials': config['materials'],
+        'coef': config['coef'],
+        'method': config['method'],
+        'elemento': config['elemento'],
+        'diametro_mm': float(diametro_mm),
+        'd_linha': float(d_linha),
+        **disposicao,
+    })
+
+
+def chave_armadura(config:dict, armadura:dict) -> str:
+    '''
+    Chave da seção a partir dos argumentos de armadura do calcular_envoltoria (com os mesmos padrões)
+
+    Parameters
+    ----------
+    config: configuração carregada do config.yaml
+    armadura: argumentos de armadura (diametro_mm, nx, ny, n_barras, d_linha)
+    '''
+    return chave_secao(
+        config,
+        armadura.get('diametro_mm', 12.5),
+        armadura.get('nx', 3),
+        armadura.get('ny', 3),
+        armadura.get('n_barras'),
+        armadura.get('d_linha', 3.5),
+    )
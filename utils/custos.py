@@ -0,0 +1,123 @@
+import json
+import os
+import heapq
+import math
+from utils.chaves import segunda_ordem
+from utils.persistencia import PASTA_CACHE, salvar_json
+
+CUSTO_SECAO = 0.05  # Custo inicial (s) de um caso de seção única
+CUSTO_2_ORDEM = 1.0  # Custo inicial (s) de um caso com 2ª ordem (method.2_ordem 4/5, L > 0)
+PESO = 0.3  # Peso de cada nova observação na média móvel exponencial
+
+
+def custo_inicial(config:dict) -> float:
+    '''
+    Custo previsto de um caso sem histórico, pelo método de cálculo do config
+    '''
+    return CUSTO_2_ORDEM if segunda_ordem(config) else CUSTO_SECAO
+
+
+class ModeloCusto:
+    '''
+    Custo previsto (tempo de engine, s) de cada caso, aprendido dos tempos das execuções anteriores.
+
+    A estimativa é uma média móvel exponencial por seção armada e frame (frames
+    lentos se repetem entre execuções), com a média da seção como alternativa para
+    frames novos e o custo_inicial do método quando a seção nunca foi calculada.
+    '''
+
+    def __init__(self, config:dict, caminho:str = os.path.join(PASTA_CACHE, 'custos.json'), peso:float = PESO):
+        self.caminho = caminho
+        self.peso = peso
+        self.inicial = custo_inicial(config)
+        self.secoes = {}  # secao → [média, observações]
+        self.frames = {}  # secao|frame → [média, observações]
+
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            self.secoes = dados.get('secoes', {})
+            self.frames = dados.get('frames', {})
+
+    def prever(self, secao:str, frames:list[str]) -> list[float]:
+        '''
+        Custo previsto de cada caso de uma seção
+        '''
+        padrao = self.secoes.get(secao, [self.inicial])[0]
+        return [self.frames.get(f'{secao}|{frame}', [padrao])[0] for frame in frames]
+
+    def _atualizar(self, tabela:dict, chave:str, tempo:float):
+        entrada = tabela.get(chave)
+        if entrada is None:
+            tabela[chave] = [tempo, 1]
+        else:
+            entrada[0] = (1 - self.peso)*entrada[0] + self.peso*tempo
+            entrada[1] += 1
+
+    def registrar(self, lote_data:dict, resultado:dict):
+        '''
+        Incorpora os tempos por caso de um lote concluído (resultado['tempos'] do processar_lote)
+        '''
+        tempos = resultado.get('tempos')
+        if not tempos:
+            return
+
+        secao = lote_data['secao']
+        frame_por_indice = dict(zip(lote_data['indices'], lote_data['frame']))
+        for indice, tempo in zip(resultado['indices'], tempos):
+            self._atualizar(self.secoes, secao, tempo)
+            self._atualizar(self.frames, f'{secao}|{frame_por_indice[indice]}', tempo)
+
+    def salvar(self):
+        salvar_json(self.caminho, {'secoes': self.secoes, 'frames': self.frames})
+
+
+def balancear_lotes(lotes, modelo:ModeloCusto, n_processos:int, tamanho_lote:int = 10):
+    '''
+    Reagrupa os casos em lotes de mesmo tempo previsto (LPT: maior custo primeiro, no lote mais leve)
+
+    A quantidade de lotes mantém o tamanho médio em tamanho_lote, arredondada para um
+    múltiplo de n_processos, de modo que todos os workers terminem juntos. Todos os lotes
+    são lidos antes do reagrupamento (o despacho durante a leitura do Excel é perdido).
+    Os lotes são entregues do mais caro para o mais barato, cada um com os índices em ordem.
+
+    Parameters
+    ----------
+    lotes: lotes (ou gerador de lotes) com 'armadura' e 'secao' (deduplicar_lotes)
+    modelo: ModeloCusto com os tempos das execuções anteriores
+    '''
+    casos = []
+    for lote in lotes:
+        custos = modelo.prever(lote['secao'], lote['frame'])
+        for indice, esforco, combinacao, frame, custo in zip(lote['indices'], lote['esforcos'], lote['combine'], lote['frame'], custos):
+            casos.append((custo, indice, esforco, combinacao, frame, lote['armadura'], lote['secao']))
+
+    if not casos:
+        return
+
+    n_lotes = math.ceil(math.ceil(len(casos)/tamanho_lote) / n_processos) * n_processos
+    n_lotes = min(n_lotes, len(casos))
+
+    # Heap de (tempo previsto, id) dos lotes; cada caso vai para o mais leve
+    carga = [(0.0, i) for i in range(n_lotes)]
+    grupos = [[] for _ in range(n_lotes)]
+    for caso in sorted(casos, key=lambda caso: (-caso[0], caso[1])):
+        tempo, i = heapq.heappop(carga)
+        grupos[i].append(caso)
+        heapq.heappush(carga, (tempo + caso[0], i))
+
+    previsto = {i: tempo for tempo, i in carga}
+    print(f"⚖️  {len(casos)} casos em {n_lotes} lotes balanceados: {min(previsto.values()):.1f}s a {max(previsto.values()):.1f}s previstos por lote")
+
+    for i in sorted(previsto, key=previsto.get, reverse=True):
+        grupo = sorted(grupos[i], key=lambda caso: caso[1])
+
+        # Um lote por seção (os lotes carregam uma única armadura)
+        secoes = {}
+        for custo, indice, esforco, combinacao, frame, armadura, secao in grupo:
+            lote = secoes.setdefault(secao, {'indices': [], 'esforcos': [], 'combine': [], 'frame': [], 'armadura': armadura, 'secao': secao})
+            lote['indices'].append(indice)
+            lote['esforcos'].append(esforco)
+            lote['combine'].append(combinacao)
+            lote['frame'].append(frame)
+        yield from secoes.values()
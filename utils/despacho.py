@@ -0,0 +1,171 @@
+import math
+import time
+import threading
+from collections import deque
+from itertools import count
+
+MAX_TENTATIVAS = 2  # Execuções de um caso isolado antes de ser dado como falho
+MAX_COPIA = 10  # Maior pedaço (em casos) copiado por um worker ocioso no fim da execução
+
+
+class FilaDinamica:
+    '''
+    Fila compartilhada de casos pendentes, consumida em pedaços pelos workers.
+
+    O tamanho de cada pedaço acompanha o trabalho restante (metade do que caberia a
+    cada worker, entre minimo e maximo), de modo que os pedaços ficam pequenos no
+    fim da execução. Um pedaço cujo worker morreu volta para a fila (dividido ao
+    meio, até isolar o caso). Quando a fila esvazia, um worker ocioso recebe uma
+    cópia do pedaço em execução mais antigo com até maximo_copia casos; o primeiro
+    resultado vale e o worker da outra cópia é interrompido (encerrar(forcar=True)).
+    Pedaços maiores não são copiados, para que um pedaço lento de 2ª ordem não tenha
+    o trabalho dobrado.
+    '''
+
+    def __init__(self, n_workers:int, minimo:int = 5, maximo:int = 50, maximo_copia:int = MAX_COPIA):
+        self.n_workers = n_workers
+        self.minimo = minimo
+        self.maximo = maximo
+        self.maximo_copia = maximo_copia
+        self.condicao = threading.Condition()
+        self.pendentes = deque()  # lotes (ou restos de lotes) ainda não despachados
+        self.n_pendentes = 0
+        self.fim_entrada = False
+        self.cancelada = False
+        self.em_execucao = {}  # id do pedaço → {'pedaco', 'inicio', 'copias': [worker, ...], 'copiado'}
+        self.atribuidos = {}  # worker → id do pedaço que ele está calculando
+        self.concluidos = set()
+        self._ids = count()
+
+    def adicionar(self, lote:dict):
+        with self.condicao:
+            lote = dict(lote, tentativas=lote.get('tentativas', 0))
+            self.pendentes.append(lote)
+            self.n_pendentes += len(lote['indices'])
+            self.condicao.notify_all()
+
+    def encerrar_entrada(self):
+        '''
+        Sinaliza que nenhum lote novo será adicionado
+        '''
+        with self.condicao:
+            self.fim_entrada = True
+            self.condicao.notify_all()
+
+    def cancelar(self):
+        '''
+        Descarta o trabalho pendente; os workers param após o pedaço atual
+        '''
+        with self.condicao:
+            self.cancelada = True
+            self.fim_entrada = True
+            self.pendentes.clear()
+            self.n_pendentes = 0
+            self.condicao.notify_all()
+
+    def _cortar(self) -> dict:
+        tamanho = math.ceil(self.n_pendentes / (2*self.n_workers))
+        tamanho = max(self.minimo, min(self.maximo, tamanho))
+
+        lote = self.pendentes[0]
+        pedaco = {chave: (valor[:tamanho] if isinstance(valor, list) else valor) for chave, valor in lote.items()}
+        if len(lote['indices']) <= tamanho:
+            self.pendentes.popleft()
+        else:
+            for chave in ('indices', 'esforcos', 'combine', 'frame'):
+                lote[chave] = lote[chave][tamanho:]
+
+        self.n_pendentes -= len(pedaco['indices'])
+        pedaco['id'] = next(self._ids)
+        return pedaco
+
+    def pegar(self, worker) -> dict|None:
+        '''
+        Próximo pedaço para o worker; None quando não há mais trabalho
+        '''
+        with self.condicao:
+            while not self.cancelada:
+                if self.pendentes:
+                    pedaco = self._cortar()
+                    self.em_execucao[pedaco['id']] = {'pedaco': pedaco, 'inicio': time.time(), 'copias': [worker], 'copiado': False}
+                    self.atribuidos[worker] = pedaco['id']
+                    return pedaco
+
+                if self.fim_entrada:
+                    # Fila vazia: cópia do pedaço pequeno em execução mais antigo (no máximo uma por pedaço)
+                    candidatos = [execucao for execucao in self.em_execucao.values()
+                                  if not execucao['copiado'] and len(execucao['pedaco']['indices']) <= self.maximo_copia]
+                    if candidatos:
+                        execucao = min(candidatos, key=lambda execucao: execucao['inicio'])
+                        execucao['copias'].append(worker)
+                        execucao['copiado'] = True
+                        self.atribuidos[worker] = execucao['pedaco']['id']
+                        return execucao['pedaco']
+                    if not self.em_execucao:
+                        return None
+
+                self.condicao.wait(timeout=1)
+            return None
+
+    def concluir(self, pedaco:dict, worker) -> bool:
+        '''
+        Registra o resultado de um pedaço e interrompe os workers das outras cópias
+
+        Um worker só é interrompido se ainda estiver no mesmo pedaço; a conferência e a
+        interrupção acontecem sob a trava da fila, antes que ele possa pegar outro pedaço.
+
+        Returns
+        -------
+        Se o resultado vale (primeira cópia a terminar)
+        '''
+        with self.condicao:
+            self.atribuidos.pop(worker, None)
+            execucao = self.em_execucao.get(pedaco['id'])
+            if execucao is None or pedaco['id'] in self.concluidos:
+                return False
+
+            self.concluidos.add(pedaco['id'])
+            del self.em_execucao[pedaco['id']]
+            for copia in execucao['copias']:
+                if copia is not worker and self.atribuidos.get(copia) == pedaco['id']:
+                    # A cópia mais lenta é interrompida; o worker é recriado no próximo pedaço
+                    copia.encerrar(forcar=True)
+            self.condicao.notify_all()
+            return True
+
+    def devolver(self, pedaco:dict, worker) -> dict|None:
+        '''
+        Devolve à fila um pedaço cujo worker morreu ou travou
+
+        Returns
+        -------
+        O pedaço, se o caso isolado esgotou as tentativas e deve ser dado como falho; senão None
+        '''
+        with self.condicao:
+            self.atribuidos.pop(worker, None)
+            execucao = self.em_execucao.get(pedaco['id'])
+            if execucao is None:
+                return None
+
+            execucao['copias'].remove(worker)
+            if execucao['copias']:
+                # Outra cópia segue em execução
+                return None
+
+            del self.em_execucao[pedaco['id']]
+            self.concluidos.add(pedaco['id'])
+            self.condicao.notify_all()
+
+            tentativas = pedaco['tentativas'] + 1
+            if self.cancelada or (len(pedaco['indices']) == 1 and tentativas >= MAX_TENTATIVAS):
+                return pedaco
+
+            # Divide ao meio e recoloca no início da fila
+            meio = max(len(pedaco['indices'])//2, 1)
+            for parte in reversed([slice(0, meio), slice(meio, None)]):
+                novo = {chave: (valor[parte] if isinstance(valor, list) else valor) for chave, valor in pedaco.items() if chave != 'id'}
+                if novo['indices']:
+                    novo['tentativas'] = tentativas
+                    self.pendentes.appendleft(novo)
+                    self.n_pendentes += len(novo['indices'])
+            return None
@@ -0,0 +1,181 @@
+import sys
+import time
+import multiprocessing as mp
+from utils.vigia import Vigia
+
+
+def _servir_engine(conexao, jar_path:str, tamanho_cache:int):
+    '''
+    Laço do processo filho: hospeda a JVM/PCalcEngine e atende chamadas pela conexão
+    '''
+    # O stdout do pai pode estar reservado a um protocolo (worker residente)
+    sys.stdout = sys.stderr
+
+    from utils.wapper import PCalcEngine
+    engine = PCalcEngine(jar_path=jar_path, tamanho_cache=tamanho_cache)
+    conexao.send(('pronto', None, engine.estatisticas_cache()))
+
+    while True:
+        try:
+            metodo, kwargs = conexao.recv()
+        except EOFError:
+            break
+
+        try:
+            resultado = getattr(engine, metodo)(**kwargs)
+            conexao.send(('ok', resultado, engine.estatisticas_cache()))
+        except Exception as e:
+            conexao.send(('erro', repr(e), engine.estatisticas_cache()))
+
+
+class EngineProcesso:
+    '''
+    PCalcEngine hospedado em um processo filho com PID conhecido.
+
+    Um cálculo que estoura o timeout mata apenas o processo (e a JVM) deste
+    engine; os engines dos demais workers não são afetados. O novo processo
+    é iniciado imediatamente e carrega a JVM enquanto o chamador segue.
+
+    O prazo das chamadas é vigiado por um único Vigia (thread de longa duração)
+    por engine, que mata o processo quando a chamada atual expira.
+    '''
+
+    def __init__(self, jar_path:str = r"engine/pcalc.jar", tamanho_cache:int = 16, timeout_inicio:float = 120):
+        self.jar_path = jar_path
+        self.tamanho_cache = tamanho_cache
+        self.timeout_inicio = timeout_inicio
+        self._contexto = mp.get_context('spawn')
+        self.processo = None
+        self.conexao = None
+        self.pronto = False
+        self.vigia = Vigia(nome='vigia-engine')
+
+        # Contadores do cache dos processos já encerrados + do processo atual
+        self._cache_encerrados = {'hits': 0, 'misses': 0}
+        self._cache_atual = {'hits': 0, 'misses': 0}
+        self.iniciar()
+
+    @property
+    def pid(self) -> int|None:
+        return self.processo.pid if self.processo else None
+
+    def iniciar(self):
+        '''
+        Inicia o processo filho do engine (não bloqueia até a JVM subir)
+        '''
+        self.conexao, conexao_filho = self._contexto.Pipe()
+        self.processo = self._contexto.Process(
+            target=_servir_engine,
+            args=(conexao_filho, self.jar_path, self.tamanho_cache),
+            daemon=True
+        )
+        self.processo.start()
+        conexao_filho.close()
+        self.pronto = False
+
+    def _aguardar_pronto(self):
+        '''
+        Aguarda a JVM do processo filho subir (fora do timeout dos cálculos)
+        '''
+        if not self.conexao.poll(self.timeout_inicio):
+            self.matar()
+            raise TimeoutError(f"Engine não inicializou em {self.timeout_inicio:.0f}s")
+
+        try:
+            self.conexao.recv()
+        except EOFError:
+            self.matar()
+            raise RuntimeError("Processo do engine encerrado durante a inicialização")
+        self.pronto = True
+
+    def matar(self):
+        '''
+        Mata apenas o processo deste engine
+        '''
+        if self.processo is None:
+            return
+
+        if self.processo.is_alive():
+            self.processo.kill()
+        self.processo.join()
+        self.conexao.close()
+
+        for chave in self._cache_encerrados:
+            self._cache_encerrados[chave] += self._cache_atual[chave]
+        self._cache_atual = {'hits': 0, 'misses': 0}
+        self.processo = None
+
+    def reiniciar(self):
+        '''
+        Substitui o processo do engine por um novo
+        '''
+        inicio = time.time()
+        self.matar()
+        self.iniciar()
+        print(f"    → Engine PID {self.pid} reiniciado ({(time.time() - inicio)*1000:.0f}ms)", flush=True)
+
+    def preparar(self):
+        '''
+        Garante um processo vivo com a JVM pronta, fora do timeout (e do tempo medido) dos cálculos
+        '''
+        if self.processo is None or not self.processo.is_alive():
+            self.reiniciar()
+        if not self.pronto:
+            self._aguardar_pronto()
+
+    def chamar(self, metodo:str, timeout:float|None = None, **kwargs):
+        '''
+        Executa um método do PCalcEngine no processo filho
+
+        Raises
+        ------
+        TimeoutError: se o processo não responder no prazo (o processo é morto)
+        RuntimeError: se o engine lançar uma exceção ou o processo morrer
+        '''
+        self.preparar()
+
+        # O vigia mata o processo no fim do prazo, o que desbloqueia o recv
+        pid = self.pid
+        self.vigia.armar(timeout, self.processo.kill)
+        try:
+            self.conexao.send((metodo, kwargs))
+            status, resultado, self._cache_atual = self.conexao.recv()
+        except (EOFError, OSError):
+            expirou = self.vigia.desarmar()
+            self.matar()
+            if expirou:
+                raise TimeoutError(f"Engine PID {pid} não respondeu em {timeout:.1f}s")
+            raise RuntimeError("Processo do engine encerrado durante o cálculo")
+        self.vigia.desarmar()
+
+        if status != 'ok':
+            raise RuntimeError(resultado)
+        return resultado
+
+    def calcular_envoltoria(self, timeout:float|None = None, **kwargs):
+        '''
+        Mesmo contrato do PCalcEngine.calcular_envoltoria, com timeout rígido
+        '''
+        return self.chamar('calcular_envoltoria', timeout=timeout, **kwargs)
+
+    def estatisticas_cache(self) -> dict:
+        hits = self._cache_encerrados['hits'] + self._cache_atual['hits']
+        misses = self._cache_encerrados['misses'] + self._cache_atual['misses']
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'taxa_acerto': hits/total if total else 0.0
+        }
+
+    def encerrar(self):
+        '''
+        Encerra o processo do engine de forma limpa
+        '''
+        self.vigia.encerrar()
+        if self.processo is None:
+            return
+
+        self.conexao.close()
+        self.processo.join(timeout=5)
+        self.matar()
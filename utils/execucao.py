@@ -0,0 +1,365 @@
+import subprocess
+import time
+import json
+import os
+import queue
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.residente import WorkerResidente
+from utils.misc import matar_arvore
+from utils.despacho import FilaDinamica
+from utils.prazos import TIMEOUT_CASO, prazo_lote
+
+
+def executar_lote(lote_id, lote_data, timeout=300):
+    """
+    Executa um lote em subprocess e aguarda finalização
+    """
+    # Salva dados do lote em arquivo JSON temporário
+    lote_file = f'lote_{lote_id}.json'
+    with open(lote_file, 'w') as f:
+        json.dump(lote_data, f)
+    
+    print(f"\n{'='*70}")
+    print(f"   LOTE {lote_id + 1} - Iniciando subprocess")
+    print(f"   Índices: {lote_data['indices'][0]} a {lote_data['indices'][-1]}")
+    print(f"   Total de cálculos: {len(lote_data['esforcos'])}")
+    print(f"{'='*70}\n")
+    
+    inicio = time.time()
+    
+    try:
+        # Executa o worker em subprocess
+        processo = subprocess.Popen(
+            ['python', 'worker.py', lote_file],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        try:
+            stdout, stderr = processo.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # Mata o worker e o processo do seu engine, sem afetar os outros lotes
+            matar_arvore(processo.pid)
+            processo.communicate()
+            raise
+        resultado = subprocess.CompletedProcess(processo.args, processo.returncode, stdout, stderr)
+        
+        tempo_decorrido = time.time() - inicio
+        
+        # Verifica resultado
+        if resultado.returncode == 0:
+            print(f"\n LOTE {lote_id + 1} - SUCESSO ({tempo_decorrido:.1f}s)")
+            
+            # Lê resultados
+            resultado_file = f'resultado_{lote_id}.json'
+            if os.path.exists(resultado_file):
+                with open(resultado_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            else:
+                print(f"⚠️  Arquivo de resultado não encontrado")
+                return None
+        else:
+            print(f"\n LOTE {lote_id + 1} - FALHOU (código: {resultado.returncode})")
+            print(f"STDOUT: {resultado.stdout}")
+            print(f"STDERR: {resultado.stderr}")
+            return None
+            
+    except subprocess.TimeoutExpired:
+        print(f"\n LOTE {lote_id + 1} - TIMEOUT ({timeout}s)")
+        return None
+        
+    except Exception as e:
+        print(f"\n LOTE {lote_id + 1} - ERRO: {e}")
+        return None
+    
+    finally:
+        # Limpa arquivo temporário do lote
+        if os.path.exists(lote_file):
+            os.remove(lote_file)
+
+
+def lote_falho(lote_data):
+    """
+    Resultado de um lote que não retornou (timeout, erro ou worker morto)
+    """
+    return {
+        'indices': lote_data['indices'],
+        'fs': [['falhou']*11 for _ in lote_data['indices']],
+        'sucessos': [],
+        'falhas': list(lote_data['indices'])
+    }
+
+
+def executar_lote_residente(workers, lote_id, lote_data, timeout=300):
+    """
+    Executa um lote em um worker residente livre, devolvendo-o ao pool no final
+    """
+    worker = workers.get()
+    try:
+        print(f"   LOTE {lote_id + 1} → worker {worker.id_worker} ({len(lote_data['esforcos'])} cálculos)")
+        inicio = time.time()
+        resultado = worker.executar(lote_data, timeout)
+        tempo_decorrido = time.time() - inicio
+
+        if resultado:
+            print(f"\n LOTE {lote_id + 1} - SUCESSO ({tempo_decorrido:.1f}s)")
+        else:
+            print(f"\n LOTE {lote_id + 1} - FALHOU ({tempo_decorrido:.1f}s) - worker {worker.id_worker} será recriado")
+        return resultado
+
+    except Exception as e:
+        print(f"\n LOTE {lote_id + 1} - ERRO: {e}")
+        worker.encerrar(forcar=True)
+        return None
+
+    finally:
+        workers.put(worker)
+
+
+def executar_lote_servidor(servidores, lote_id, lote_data):
+    """
+    Executa um lote nesta thread com um engine emprestado do pool de servidores
+
+    O timeout de cada bloco mata apenas o servidor do engine; o estado do orquestrador é preservado.
+    """
+    # Importado aqui: o worker.py só é necessário no modo servidor (o lote roda nesta thread)
+    from worker import processar_lote
+
+    with servidores.engine() as engine:
+        try:
+            print(f"   LOTE {lote_id + 1} → engine PID {engine.pid} ({len(lote_data['esforcos'])} cálculos)")
+            inicio = time.time()
+            resultado = processar_lote(lote_data, engine=engine)
+            print(f"\n LOTE {lote_id + 1} - SUCESSO ({time.time() - inicio:.1f}s)")
+            return resultado
+
+        except Exception as e:
+            print(f"\n LOTE {lote_id + 1} - ERRO: {e}")
+            engine.matar()
+            return None
+
+
+def executar_lotes(lotes, n_processos=None, timeout=300, residente=True, max_casos=5_000, armazem=None, workers=None, custos=None, prazos=None,
+                   servidores=None):
+    """
+    Executa os lotes em paralelo com no máximo n_processos workers simultâneos
+
+    Os lotes formam uma fila consumida pelo pool. No modo residente cada posição do
+    pool mantém um worker.py de longa duração (JVM iniciada uma vez, lotes trocados
+    por stdin/stdout); caso contrário, cada lote roda em um subprocess próprio.
+
+    lotes pode ser um gerador (preparar_lotes_streaming): cada lote é despachado
+    assim que é produzido, antes do fim da leitura do Excel.
+
+    armazem: ArmazemResultados onde os casos calculados são gravados a cada lote concluído
+    workers: pool de workers residentes (criar_workers) reaproveitado entre chamadas;
+    se não for informado, o pool é criado e encerrado nesta chamada
+    servidores: PoolEngines; cada lote roda em uma thread do orquestrador com um engine do
+    pool (servidor local por socket), sem worker.py intermediário
+    custos: ModeloCusto atualizado com os tempos por caso de cada lote concluído
+    prazos: PoliticaPrazos atualizada com as latências de cada lote concluído; o timeout
+    de cada lote passa a ser o prazo_lote dos seus casos em vez de timeout
+    """
+    n_processos = n_processos or os.cpu_count() or 1
+    lotes_enviados = []
+
+    pool_proprio = workers is None
+    if pool_proprio:
+        workers = criar_workers(n_processos if residente and servidores is None else 0, max_casos=max_casos)
+
+    with ThreadPoolExecutor(max_workers=n_processos) as pool:
+        futuros = {}
+        for i, lote in enumerate(lotes):
+            lotes_enviados.append(lote)
+            timeout_lote = prazo_lote(lote, TIMEOUT_CASO) if prazos is not None else timeout
+            if servidores is not None:
+                futuros[pool.submit(executar_lote_servidor, servidores, i, lote)] = i
+                continue
+
+            # O worker conhece o prazo do lote e para de dividir blocos quando ele se esgota
+            lote = dict(lote, prazo=timeout_lote)
+            if residente:
+                futuros[pool.submit(executar_lote_residente, workers, i, lote, timeout_lote)] = i
+            else:
+                futuros[pool.submit(executar_lote, i, lote, timeout_lote)] = i
+
+        resultados_lotes = [None]*len(lotes_enviados)
+        for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+            i = futuros[futuro]
+            resultado = futuro.result()
+            resultados_lotes[i] = resultado if resultado else lote_falho(lotes_enviados[i])
+            if armazem is not None and resultado:
+                armazem.gravar_lote(lotes_enviados[i], resultado)
+            if custos is not None and resultado:
+                custos.registrar(lotes_enviados[i], resultado)
+            if prazos is not None and resultado:
+                prazos.registrar(lotes_enviados[i], resultado)
+            print(f"📊 {concluidos}/{len(lotes_enviados)} lotes concluídos")
+
+    # Encerra os workers residentes criados nesta chamada
+    if pool_proprio:
+        encerrar_workers(workers)
+
+    return resultados_lotes
+
+
+def _atender_fila(fila, worker, concluidos):
+    """
+    Laço de um worker residente no despacho dinâmico: pega pedaços da fila até ela esgotar
+    """
+    while True:
+        pedaco = fila.pegar(worker)
+        if pedaco is None:
+            break
+
+        try:
+            prazo = prazo_lote(pedaco, TIMEOUT_CASO)
+            resultado = worker.executar(dict(pedaco, prazo=prazo), timeout=prazo)
+        except Exception as e:
+            print(f"\n Worker {worker.id_worker} - ERRO: {e}")
+            worker.encerrar(forcar=True)
+            resultado = None
+
+        if resultado:
+            if fila.concluir(pedaco, worker):
+                concluidos.put((pedaco, resultado))
+        else:
+            falho = fila.devolver(pedaco, worker)
+            if falho:
+                concluidos.put((falho, None))
+
+
+def executar_dinamico(lotes, n_processos=None, max_casos=5_000, armazem=None, workers=None, custos=None,
+                      minimo=5, maximo=50, prazos=None):
+    """
+    Executa os casos com despacho dinâmico: cada worker residente pega pequenos pedaços de uma fila compartilhada
+
+    Ao contrário do executar_lotes, um travamento segura apenas o pedaço em que
+    ocorreu: o pedaço de um worker que morreu volta para a fila (dividido até isolar
+    o caso) e, no fim da execução, workers ociosos recalculam os pedaços pequenos
+    mais atrasados (FilaDinamica.maximo_copia). Os lotes servem apenas de entrada
+    (podem ser um gerador); armazem, custos e prazos são atualizados nesta thread a
+    cada pedaço concluído. O prazo de cada pedaço vem do 'timeout_caso' dos lotes
+    (PoliticaPrazos.aplicar).
+
+    minimo, maximo: limites do tamanho dos pedaços (em casos)
+    """
+    n_processos = n_processos or os.cpu_count() or 1
+
+    pool_proprio = workers is None
+    if pool_proprio:
+        workers = criar_workers(n_processos, max_casos=max_casos)
+
+    fila = FilaDinamica(n_processos, minimo=minimo, maximo=maximo)
+    concluidos = queue.Queue()
+    resultados_lotes = []
+
+    def registrar(pedaco, resultado):
+        resultados_lotes.append(resultado if resultado else lote_falho(pedaco))
+        if resultado and armazem is not None:
+            armazem.gravar_lote(pedaco, resultado)
+        if resultado and custos is not None:
+            custos.registrar(pedaco, resultado)
+        if resultado and prazos is not None:
+            prazos.registrar(pedaco, resultado)
+
+    def drenar(timeout=None):
+        try:
+            while True:
+                registrar(*concluidos.get(timeout=timeout))
+                timeout = None if timeout is None else 0
+        except queue.Empty:
+            pass
+
+    # Cada thread atende a fila com um worker residente fixo
+    residentes = [workers.get() for _ in range(min(n_processos, workers.qsize()))]
+    atendentes = [Thread(target=_atender_fila, args=(fila, worker, concluidos), daemon=True) for worker in residentes]
+    for atendente in atendentes:
+        atendente.start()
+
+    try:
+        # A leitura dos lotes (e os filtros sobre o armazém) fica nesta thread
+        for lote in lotes:
+            fila.adicionar(lote)
+            drenar(timeout=0)
+        fila.encerrar_entrada()
+
+        while any(atendente.is_alive() for atendente in atendentes):
+            drenar(timeout=0.5)
+        drenar(timeout=0)
+    finally:
+        # Em caso de erro, os atendentes terminam o pedaço atual e param
+        fila.cancelar()
+        for atendente in atendentes:
+            atendente.join()
+        for worker in residentes:
+            workers.put(worker)
+
+    print(f"📊 {len(resultados_lotes)} pedaços concluídos")
+
+    if pool_proprio:
+        encerrar_workers(workers)
+
+    return resultados_lotes
+
+
+def criar_workers(n_processos, max_casos=5_000):
+    """
+    Cria o pool (fila) de workers residentes; os processos iniciam no primeiro lote
+    """
+    workers = queue.Queue()
+    for id_worker in range(n_processos):
+        workers.put(WorkerResidente(id_worker, max_casos=max_casos))
+    return workers
+
+
+def encerrar_workers(workers):
+    """
+    Encerra todos os workers residentes do pool
+    """
+    while not workers.empty():
+        workers.get().encerrar()
+
+
+def consolidar_resultados(resultados_lotes, duplicatas=None, reaproveitados=None):
+    """
+    Consolida resultados de todos os lotes, remontando os FS pela ordem dos índices
+
+    'fs' segue a ordem de 'indices' (os índices não precisam ser contínuos nem começar em 0)
+
+    duplicatas: índice duplicado → índice calculado (deduplicar_lotes); o FS do
+    caso calculado é replicado para cada duplicata
+    reaproveitados: índice → FS lido do armazém de resultados (filtrar_armazenados)
+    """
+    duplicatas = duplicatas or {}
+    reaproveitados = reaproveitados or {}
+    fs_por_indice = dict(reaproveitados)
+    sucessos_total = list(reaproveitados)
+    falhas_total = []
+    cache_total = {'hits': 0, 'misses': 0}
+    
+    for resultado in resultados_lotes:
+        if resultado:
+            fs_por_indice.update(zip(resultado.get('indices', []), resultado.get('fs', [])))
+            sucessos_total.extend(resultado.get('sucessos', []))
+            falhas_total.extend(resultado.get('falhas', []))
+            for chave in cache_total:
+                cache_total[chave] += resultado.get('cache', {}).get(chave, 0)
+
+    # Replica os resultados para os casos deduplicados
+    calculados_com_sucesso = set(sucessos_total)
+    for duplicado, calculado in duplicatas.items():
+        fs_por_indice[duplicado] = fs_por_indice.get(calculado, ['falhou']*11)
+        (sucessos_total if calculado in calculados_com_sucesso else falhas_total).append(duplicado)
+    
+    indices = sorted(fs_por_indice)
+    return {
+        'indices': indices,
+        'fs': [fs_por_indice[i] for i in indices],
+        'sucessos': sorted(sucessos_total),
+        'falhas': sorted(falhas_total),
+        'cache': cache_total,
+        'deduplicados': len(duplicatas),
+        'reaproveitados': len(reaproveitados)
+    }
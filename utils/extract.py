@@ -1,5 +1,12 @@
+import os
+import pickle
 import pandas as pd
+import numpy as np
+from collections.abc import Iterator
+from openpyxl import load_workbook
 from utils.convert import kn_para_tf
+from utils.chaves import _hash
+from utils.persistencia import PASTA_CACHE
 from pandas import DataFrame
 import yaml
 
@@ -61,17 +68,13 @@ def extremos(df:DataFrame, lim:float) -> DataFrame:
     df: dataframe com os esforços
 
     '''
-    # Dados
-    temp = {}
+    estacao = pd.to_numeric(df['Station'])
 
-    # Iterando sobre os frames para buscar os valores extermos de comprimento do frame
-    for frame in df['Frame'].unique():
-        # Selecionando apenas a série com frames
-        df_temp = df[df['Frame'] == frame] 
-
-        # Atribuindo os valores limitrofes na variavel temp
-        temp[frame] = {'max':df_temp[df_temp['Station']<=lim]['Station'].max(), 'min':df_temp['Station'].min()}
-    return pd.DataFrame.from_dict(temp, orient='index')
+    # Máximo dentro do limite de comprimento e mínimo absoluto de cada frame
+    return pd.DataFrame({
+        'max': estacao.where(estacao <= lim).groupby(df['Frame'], sort=False).max(),
+        'min': estacao.groupby(df['Frame'], sort=False).min(),
+    })
 
 
 
@@ -80,21 +83,16 @@ def frame_body(df, lim):
     Faz o pre tratamento de valores para o caso onde existe esforço no corpo
     '''
 
-    df_limites = extremos(df, lim)
-    
+    # Extremos de cada frame calculados sobre todas as linhas de uma vez
+    df = df.reset_index(drop=True)
+    estacao = pd.to_numeric(df['Station'])
+    maximo = estacao.where(estacao <= lim).groupby(df['Frame'], sort=False).transform('max')
+    minimo = estacao.groupby(df['Frame'], sort=False).transform('min')
 
-    df_limites['Frame'] = df_limites.index
-    # Fazer merge
-    df_com_limites = df.merge(df_limites, on='Frame', how='left')
     # Filtrar apenas os extremos
-    df_filtrado = df_com_limites[
-        (df_com_limites['Station'] == df_com_limites['min']) | 
-        (df_com_limites['Station'] == df_com_limites['max'])
-    ]
+    df_filtrado = df[(estacao == minimo) | (estacao == maximo)]
 
 
-    # Remover colunas auxiliares
-    df_filtrado = df_filtrado.drop(columns=['min', 'max'])
     df_filtrado = df_filtrado.drop_duplicates(subset=['Frame', 'Station', 'M3', 'M2', 'P', 'OutputCase'])
 
     # A ordem está certa
@@ -121,16 +119,123 @@ def frame_body(df, lim):
 
 
 
-def pre_treatment(path, lim:float):
+def ler_tabela(path:str) -> tuple[bool, DataFrame]:
     '''
-    Prepara os dados para serem usados pelos extratores
+    Lê a tabela de esforços do export do SAP2000 em uma única leitura do Excel
+
+    A tabela lida é guardada em PASTA_CACHE, com chave pelo caminho, data de
+    modificação e tamanho do arquivo; execuções seguintes sobre o mesmo arquivo
+    (orquestrador, write.py) carregam o cache sem reprocessar o xlsx. O nome do
+    cache começa pelo hash do caminho absoluto: uma nova versão do arquivo substitui
+    apenas o cache do mesmo caminho, não o de arquivos de mesmo nome em outras pastas.
+
+    Returns
+    -------
+    Tupla com a indicação se os esforços estão em kN e a tabela sem a linha de unidades
     '''
-    df = pd.read_excel(path, header=1)
-    kn = df.iloc[0]['P'] == 'KN'
+    info = os.stat(path)
+    nome = os.path.splitext(os.path.basename(path.replace('\\', '/')))[0]
+    origem = _hash(os.path.abspath(path))[:16]
+    versao = _hash({'mtime': info.st_mtime_ns, 'tamanho': info.st_size})[:16]
+    arquivo_cache = os.path.join(PASTA_CACHE, f'{nome}-{origem}-{versao}.pkl')
+
+    if os.path.exists(arquivo_cache):
+        with open(arquivo_cache, 'rb') as arquivo:
+            return pickle.load(arquivo)
 
+    # A primeira linha após o cabeçalho traz as unidades
     df = pd.read_excel(path, header=1)
+    kn = df.iloc[0]['P'] == 'KN'
     df = df.iloc[1:]
 
+    # Remove caches antigos do mesmo arquivo e grava o novo de forma atômica
+    os.makedirs(PASTA_CACHE, exist_ok=True)
+    for antigo in os.listdir(PASTA_CACHE):
+        if antigo.endswith('.pkl') and antigo.startswith(f'{nome}-{origem}-'):
+            os.remove(os.path.join(PASTA_CACHE, antigo))
+
+    with open(arquivo_cache + '.tmp', 'wb') as arquivo:
+        pickle.dump((kn, df), arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(arquivo_cache + '.tmp', arquivo_cache)
+
+    return kn, df
+
+
+def _valor_celula(valor):
+    '''
+    Converte o valor de uma célula como o pd.read_excel (números inteiros como int, vazio como NaN)
+    '''
+    if valor is None:
+        return np.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def ler_tabela_streaming(path:str) -> Iterator[tuple[bool, DataFrame]]:
+    '''
+    Lê o export do SAP2000 linha a linha (openpyxl em modo read-only), entregando
+    a tabela de cada frame assim que as linhas dele terminam
+
+    A planilha inteira nunca é carregada em memória. Assume que as linhas de
+    cada frame são contíguas, como nos exports do SAP2000.
+
+    Returns
+    -------
+    Gerador de tuplas com a indicação se os esforços estão em kN e a tabela de um frame
+    '''
+    livro = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+    try:
+        planilha = livro.worksheets[0]
+        planilha.reset_dimensions()
+        linhas = planilha.iter_rows(values_only=True)
+
+        # Título, cabeçalho e unidades
+        next(linhas)
+        colunas = list(next(linhas))
+        while colunas and colunas[-1] is None:
+            colunas.pop()
+        unidades = next(linhas)
+        kn = unidades[colunas.index('P')] == 'KN'
+
+        i_frame = colunas.index('Frame')
+        vistos = set()
+        avisados = set()
+        buffer = []
+        atual = None
+
+        for linha in linhas:
+            linha = (list(linha) + [None]*len(colunas))[:len(colunas)]
+            if all(valor is None for valor in linha):
+                continue
+
+            frame = linha[i_frame]
+            if buffer and frame != atual:
+                yield kn, DataFrame(buffer, columns=colunas, dtype=object)
+                vistos.add(atual)
+                buffer = []
+
+                if frame is not None and frame in vistos and frame not in avisados:
+                    avisados.add(frame)
+                    print(f"⚠️  Frame {frame} aparece em trechos separados da planilha; as combinações de cada trecho serão pareadas separadamente")
+
+            atual = frame
+            buffer.append([_valor_celula(valor) for valor in linha])
+
+        if buffer:
+            yield kn, DataFrame(buffer, columns=colunas, dtype=object)
+
+    finally:
+        livro.close()
+
+
+def pre_treatment(path, lim:float):
+    '''
+    Prepara os dados para serem usados pelos extratores
+    '''
+    kn, df = ler_tabela(path)
+
     # Verificando o tipo de vinculação
     if config['elemento']['L'] == 0:
         return kn, df
@@ -139,6 +244,41 @@ def pre_treatment(path, lim:float):
         return kn, frame_body(df, lim)
         
 
+def ordenar_casos(df:DataFrame) -> DataFrame:
+    '''
+    Ordena as linhas na ordem em que são injetadas no Pcal: frame (ordem de aparição),
+    combinação (ordem de aparição dentro do frame) e posição original
+
+    Acrescenta as colunas auxiliares 'k' (posição dentro do par frame/combinação)
+    e 'n' (quantidade de linhas do par). Linhas sem frame ou combinação são descartadas.
+
+    Parameters
+    ----------
+    df: dataframe com os esforços
+    '''
+    grupo = df.groupby(['Frame', 'OutputCase'], sort=False).ngroup().to_numpy()
+    frame = pd.factorize(df['Frame'])[0]
+
+    # Ordenação estável: frame, grupo frame/combinação (ordem de aparição) e posição
+    ordem = np.lexsort((np.arange(len(df)), grupo, frame))
+    ordem = ordem[~np.isnan(grupo[ordem])]
+
+    df_ordenado = df.iloc[ordem].copy()
+    grupos = df_ordenado.groupby(grupo[ordem], sort=False)
+    df_ordenado['k'] = grupos.cumcount().to_numpy()
+    df_ordenado['n'] = grupos['Frame'].transform('size').to_numpy()
+
+    return df_ordenado
+
+
+def converter_esforco(n:float, mx:float, my:float, mx_base:float, my_base:float, kn:bool) -> tuple[float, float, float, float, float]:
+    '''
+    Arredonda os esforços do topo e converte para tf e tf.m quando a planilha está em kN
+    '''
+    valores = (round(n, 5), round(mx, 5), round(my, 5), mx_base, my_base)
+    return kn_para_tf(*valores) if kn else valores
+
+
 def init_data(path:str, lim:float=100_000.00, limit=None) ->tuple[list[tuple[float, float, float, float, float]], list[str], list[str]]:
     '''
     Prepara os dados para serem injetados no Pcal.
@@ -150,55 +290,86 @@ def init_data(path:str, lim:float=100_000.00, limit=None) ->tuple[list[tuple[flo
     limit: quantidade de dados que serão considerados na analise (slice)
 
     '''
-    # Dados
-    esforcos = []
-    combine = []
-    frame = []
-
     # Instanciando os dados
     kn, df = pre_treatment(path, lim)
 
-    #Iterando sobre os frames
-    for el_frame in list(df['Frame'].unique()):
-        # Combinações do frame
-        combinacoes = list(df[df['Frame'] == el_frame]['OutputCase'].unique())
-
-        # Iterando nas combinações do frame
-        for combinacao in combinacoes:
-            # Selecionando o elemento
-            df_slice = df[df['Frame'] == el_frame]
-
-            # Selecionado a combinação
-            df_slice = df_slice[df_slice['OutputCase'] == combinacao]
-
-            # Iterando sobre os elementos
-            for i in range(0, df_slice.shape[0], 2):
-                
-                if config['elemento']['L'] == 0:
-                    
-                    try:
-                        for el in [df_slice.iloc[i], df_slice.iloc[i+1]]:
-                            frame.append(el["Frame"])
-                            combine.append(el['OutputCase'])
-                            esforcos.append(kn_para_tf(round(el['P'], 5), round(el['M2'], 5), round(el['M3'], 5), 0, 0) 
-                                            if kn else (round(el['P'], 5), round(el['M2'], 5), round(el['M3'], 5), 0,0))
-                    except Exception as e:
-                        print(f'erro {i}: {e}')
-                        el = df_slice.iloc[i]
-                        frame.append(el["Frame"])
-                        combine.append(el['OutputCase'])
-                        esforcos.append(kn_para_tf(round(el['P'], 5), round(el['M2'], 5), round(el['M3'], 5), 0, 0) 
-                                        if kn else (round(el['P'], 5), round(el['M2'], 5), round(el['M3'], 5), 0,0))
-
-
-                    
-                else:
-                    topo, base = select_top_base(df_slice, i)
-
-                    frame.append(topo["Frame"])
-                    combine.append(topo['OutputCase'])
-                    esforcos.append(kn_para_tf(round(topo['P'], 5), round(topo['M2'], 5), round(topo['M3'], 5), round(base['M2'], 5), round(base['M3'], 5)) 
-                                    if kn else (round(topo['P'], 5), round(topo['M2'], 5), round(topo['M3'], 5), round(base['M2'], 5), round(base['M3'], 5)))
-
+    esforcos, combine, frame = extrair_casos(df, kn)
 
     return (esforcos[limit[0]:limit[1]], combine[limit[0]:limit[1]], frame[limit[0]:limit[1]]) if isinstance(limit, list) else (esforcos, combine, frame)
+
+
+def iterar_casos(path:str, lim:float=100_000.00) -> Iterator[tuple[str, str, tuple[float, float, float, float, float]]]:
+    '''
+    Versão em fluxo do init_data: gera (frame, combinação, esforço) à medida que a planilha é lida
+
+    Parameters
+    ----------
+    path: caminho do excel  
+    lim: tamanho máximo do frame  
+    '''
+    for kn, df in ler_tabela_streaming(path):
+        # Verificando o tipo de vinculação
+        if config['elemento']['L'] != 0:
+            df = frame_body(df, lim)
+
+        esforcos, combine, frame = extrair_casos(df, kn)
+        yield from zip(frame, combine, esforcos)
+
+
+def extrair_casos(df:DataFrame, kn:bool) ->tuple[list[tuple[float, float, float, float, float]], list[str], list[str]]:
+    '''
+    Monta as listas (esforcos, combine, frame) a partir do dataframe tratado
+
+    Parameters
+    ----------
+    df: dataframe com os esforços (saída do pre_treatment)
+    kn: se os esforços estão em kN e kN.m
+    '''
+    df_ordenado = ordenar_casos(df)
+
+    # Valores como objetos python (mesmo arredondamento da leitura linha a linha)
+    frames = df_ordenado['Frame'].to_numpy(dtype=object)
+    combinacoes = df_ordenado['OutputCase'].to_numpy(dtype=object)
+    p = df_ordenado['P'].to_numpy(dtype=object)
+    m2 = df_ordenado['M2'].to_numpy(dtype=object)
+    m3 = df_ordenado['M3'].to_numpy(dtype=object)
+
+    # Seção única: cada linha é um caso
+    if config['elemento']['L'] == 0:
+        esforcos = [converter_esforco(n, mx, my, 0, 0, kn) for n, mx, my in zip(p, m2, m3)]
+        return esforcos, list(combinacoes), list(frames)
+
+    # Barra: as linhas são pareadas (0-1, 2-3, ...) dentro de cada frame/combinação
+    k = df_ordenado['k'].to_numpy()
+    n = df_ordenado['n'].to_numpy()
+    inicio = np.flatnonzero(k % 2 == 0)
+    completo = k[inicio] + 1 < n[inicio]
+
+    # Topo é a linha com a menor carga normal (sem o peso)
+    p_abs = np.abs(p.astype(float))
+    seguinte = np.minimum(inicio + 1, len(p) - 1)
+    topo_primeiro = p_abs[inicio] < p_abs[seguinte]
+    topo = np.where(topo_primeiro, inicio, seguinte)
+    base = np.where(topo_primeiro, seguinte, inicio)
+
+    esforcos = []
+    combine = []
+    frame = []
+
+    for j, i in enumerate(inicio):
+        if completo[j]:
+            t, b = topo[j], base[j]
+            valores = (p[t], m2[t], m3[t], m2[b], m3[b])
+            frame.append(frames[t])
+            combine.append(combinacoes[t])
+        else:
+            # Combinação impar: mantém o julgamento do usuário do select_top_base
+            df_slice = df_ordenado.iloc[i - k[i]:i - k[i] + n[i]].drop(columns=['k', 'n'])
+            topo_impar, base_impar = select_top_base(df_slice, int(k[i]))
+            valores = (topo_impar['P'], topo_impar['M2'], topo_impar['M3'], base_impar['M2'], base_impar['M3'])
+            frame.append(topo_impar['Frame'])
+            combine.append(topo_impar['OutputCase'])
+
+        esforcos.append(converter_esforco(*valores[:3], round(valores[3], 5), round(valores[4], 5), kn))
+
+    return esforcos, combine, frame
@@ -0,0 +1,34 @@
+def filtrar_inalterados(lotes, anterior:dict, reaproveitados:dict):
+    '''
+    Remove dos lotes as linhas (frame, combinação, ordinal) com os mesmos esforços da execução anterior
+
+    O ordinal é a posição do caso dentro do seu par frame/combinação, na ordem do init_data.
+    Apenas linhas calculadas pelo engine com sucesso (FS numéricos) na execução anterior são reaproveitadas.
+
+    Parameters
+    ----------
+    lotes: lotes (ou gerador de lotes) da execução atual
+    anterior: (frame, combinação, ordinal) → (esforço, FS) (ArmazemResultados.carregar_execucao)
+    reaproveitados: preenchido com índice → FS da execução anterior
+    '''
+    ordinais = {}
+
+    for lote in lotes:
+        pendente = {'indices': [], 'esforcos': [], 'combine': [], 'frame': []}
+
+        for indice, esforco, combinacao, frame in zip(lote['indices'], lote['esforcos'], lote['combine'], lote['frame']):
+            ordinal = ordinais.get((frame, combinacao), 0)
+            ordinais[(frame, combinacao)] = ordinal + 1
+
+            linha = anterior.get((frame, combinacao, ordinal))
+            if linha and linha[0] == tuple(esforco) and all(isinstance(fs, (int, float)) for fs in linha[1]):
+                reaproveitados[indice] = linha[1]
+                continue
+
+            pendente['indices'].append(indice)
+            pendente['esforcos'].append(esforco)
+            pendente['combine'].append(combinacao)
+            pendente['frame'].append(frame)
+
+        if pendente['indices']:
+            yield pendente
@@ -35,3 +35,19 @@ def matar_java_travado():
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.TimeoutExpired):
             pass
 
+
+
+def matar_arvore(pid):
+    """Mata um processo e todos os seus descendentes (ex.: worker e a JVM do seu engine)"""
+    try:
+        processo = psutil.Process(pid)
+        alvos = processo.children(recursive=True) + [processo]
+    except psutil.NoSuchProcess:
+        return
+
+    for proc in alvos:
+        try:
+            proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    psutil.wait_procs(alvos, timeout=3)
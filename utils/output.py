@@ -6,7 +6,7 @@ with open('config.yaml', 'r') as file:
 
 
 
-def create_xlsx(resultados_fs:list[list], frame:list[str], combine:list[str], esforcos:list[tuple], name:str='saida')->None:
+def create_xlsx(resultados_fs:list[list], frame:list[str], combine:list[str], esforcos:list[tuple], name:str='saida', triagem:list[str]|None=None)->None:
     '''
     Exporta os dados em um arquivo excel
 
@@ -17,6 +17,7 @@ def create_xlsx(resultados_fs:list[list], frame:list[str], combine:list[str], es
     combine: lista com as combinações
     esforco: lista com os esforcos que provocaram os fs
     name: Nome do arquivo de saida
+    triagem: classe da triagem de cada caso ('segura', 'falha' ou '' se calculado pelo engine)
 
     
     '''
@@ -59,5 +60,48 @@ def create_xlsx(resultados_fs:list[list], frame:list[str], combine:list[str], es
     df['min']= mininumo
     df['verificado'] = verificados
 
+    # Casos classificados pela triagem (FS de 1ª ordem, sem o engine)
+    if triagem is not None:
+        df['triagem'] = triagem
+
     # Exportando o excel
     df.to_excel(f'PCAL-{name}.xlsx')
+
+
+def exportar_falhas(sem_solucao:dict, frame:list[str], combine:list[str], esforcos:list[tuple], name:str='saida',
+                    indices:list[int]|None = None) -> str:
+    '''
+    Exporta os casos que seguiram falhando após a repetição, uma linha por tentativa
+
+    Parameters
+    ---------
+    sem_solucao: índice → tentativas do repetir_caso
+    frame, combine, esforcos: dados de todos os casos, na ordem dos índices
+    name: Nome do arquivo de saida
+    indices: índice de cada posição de frame, combine e esforcos (consolidar_resultados);
+    None se as posições forem os próprios índices
+    '''
+    posicao = {indice: i for i, indice in enumerate(indices)} if indices is not None else None
+
+    linhas = []
+    for indice, tentativas in sorted(sem_solucao.items()):
+        i = posicao[indice] if posicao is not None else indice
+        for tentativa in tentativas:
+            # Uma linha por combinação com erro registrado pelo engine (ou uma só, sem erros)
+            for erro in tentativa['erros'] or [{}]:
+                linhas.append({
+                    'indice': indice,
+                    'frame': frame[i],
+                    'OutputCase': combine[i],
+                    **dict(zip(['N', 'Mx_topo', 'My_topo', 'Mx_base', 'My_base'], esforcos[i])),
+                    'timeout': tentativa['timeout'],
+                    'tipo': tentativa['tipo'],
+                    'mensagem': tentativa['mensagem'],
+                    'erro_nrd': erro.get('erro_nrd'),
+                    'erro_2ord': erro.get('erro_2ord'),
+                    'erro_mmin': erro.get('erro_mmin'),
+                })
+
+    arquivo = f'FALHAS-{name}.xlsx'
+    pd.DataFrame(linhas).to_excel(arquivo, index=False)
+    return arquivo
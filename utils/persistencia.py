@@ -0,0 +1,15 @@
+import json
+import os
+
+PASTA_CACHE = '.cache'  # Dados mantidos entre execuções: tabelas lidas, custos, prazos e curvas da triagem
+
+
+def salvar_json(caminho:str, dados:dict):
+    '''
+    Grava dados em JSON de forma atômica (arquivo temporário + os.replace), criando a pasta se necessário
+    '''
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = f'{caminho}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f)
+    os.replace(temporario, caminho)
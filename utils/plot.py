@@ -6,8 +6,9 @@ def plot_situation(resultado, dots):
     plt.ylabel('Mx (tf.m)')
     # Plotar envoltória
     for i, inf in enumerate(resultado):
-        mx = [p['mx_tfm'] for p in inf]
-        my = [p['my_tfm'] for p in inf]
+        # Curva Mr em array (N, teta, Mx, My)
+        mx = inf[:, 2]
+        my = inf[:, 3]
         plt.plot(my, mx,  'b-')
         pontos = dots[i]
         plt.scatter(pontos[2], pontos[1], s=20, color='orange', edgecolors='black',linewidths=1)
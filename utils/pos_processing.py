@@ -3,7 +3,8 @@ import os
 
 def clear_folder():
     '''
-    Remove os JSON temporário
+    Remove os JSON temporários dos lotes (lote_*.json e resultado_*.json)
     '''
-    for el in glob('*.json'):
-        os.remove(el)
+    for padrao in ('lote_*.json', 'resultado_*.json'):
+        for el in glob(padrao):
+            os.remove(el)
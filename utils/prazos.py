@@ -0,0 +1,152 @@
+import json
+import math
+import os
+from utils.blocos import TAMANHO_BLOCO
+from utils.chaves import segunda_ordem
+from utils.persistencia import PASTA_CACHE, salvar_json
+
+PERCENTIL = 0.99  # Percentil das latências observadas que define o prazo
+FATOR = 3.0  # Margem sobre o percentil
+PISO = 1.0  # Prazo mínimo por caso (s)
+TETO = 120.0  # Prazo máximo por caso (s)
+PRAZO_SECAO = 5.0  # Prazo (s) de um caso de seção única sem histórico
+PRAZO_2_ORDEM = 50.0  # Prazo (s) de um caso com 2ª ordem (method.2_ordem 4/5, L > 0) sem histórico
+TIMEOUT_CASO = 5.0  # Timeout por combinação (s) dos lotes sem 'timeout_caso'
+PARTIDA = 60.0  # Folga (s) do prazo de um lote para a inicialização da JVM
+REINICIO = 15.0  # Tempo (s) estimado da troca do engine (nova JVM) após um bloco que falhou
+TEMPO_REPETICAO = 600.0  # Soma máxima (s) dos timeouts das tentativas de um caso na repetição de falhas
+JANELA = 500  # Latências guardadas por chave (as mais recentes)
+MIN_AMOSTRAS = 20  # Latências necessárias para usar a distribuição da chave
+
+
+def chave_metodo(config:dict) -> str:
+    '''
+    Chave do método de cálculo do config (seções do mesmo método têm latências parecidas)
+    '''
+    return f"2_ordem={config['method']['2_ordem']}|L>0={segunda_ordem(config)}"
+
+
+def prazo_inicial(config:dict) -> float:
+    '''
+    Prazo por caso sem histórico, pelo método de cálculo do config
+    '''
+    return PRAZO_2_ORDEM if segunda_ordem(config) else PRAZO_SECAO
+
+
+def percentil(valores:list[float], p:float) -> float:
+    '''
+    Percentil p (0 a 1) por interpolação linear entre os valores ordenados
+    '''
+    ordenados = sorted(valores)
+    posicao = p*(len(ordenados) - 1)
+    i = int(posicao)
+    if i + 1 >= len(ordenados):
+        return ordenados[-1]
+    return ordenados[i] + (posicao - i)*(ordenados[i + 1] - ordenados[i])
+
+
+def prazo_lote(lote:dict, timeout_caso:float, tamanho_bloco:int = TAMANHO_BLOCO) -> float:
+    '''
+    Prazo (s) de um lote: inicialização do engine, o prazo de cada caso e o custo de um travamento
+
+    O processar_lote divide um bloco que trava ao meio até isolar o caso, reiniciando
+    o engine a cada divisão: um travamento custa cerca do dobro do prazo do bloco
+    mais log2(bloco) + 1 reinícios. Travamentos além desse primeiro esgotam o prazo
+    repassado ao processar_lote ('prazo'), que dá os casos restantes como falhos.
+
+    Parameters
+    ----------
+    lote: lote com o prazo por caso em 'timeout_caso' (PoliticaPrazos.aplicar)
+    timeout_caso: prazo por caso dos lotes sem 'timeout_caso'
+    tamanho_bloco: combinações por chamada ao engine no processar_lote
+    '''
+    n = len(lote['indices'])
+    bloco = max(min(n, tamanho_bloco), 1)
+    reinicios = math.ceil(math.log2(bloco)) + 1
+    return PARTIDA + (n + 2*bloco)*lote.get('timeout_caso', timeout_caso) + reinicios*REINICIO
+
+
+def timeouts_repeticao(prazo:float, fatores:tuple[float, ...], total:float = TEMPO_REPETICAO) -> tuple[float, ...]:
+    '''
+    Timeouts crescentes (s) da repetição de um caso: fatores vezes o prazo por caso, somando no máximo total
+
+    As tentativas que não cabem em total são descartadas; a primeira é limitada a total.
+    '''
+    timeouts = []
+    for fator in fatores:
+        timeout = min(fator*prazo, total)
+        if sum(timeouts) + timeout > total:
+            break
+        timeouts.append(timeout)
+    return tuple(timeouts)
+
+
+class PoliticaPrazos:
+    '''
+    Prazos (timeouts) por caso e por lote aprendidos das latências observadas.
+
+    O prazo de um caso é o percentil PERCENTIL das latências da seção armada vezes
+    FATOR, limitado a [PISO, TETO]. Seções com poucas observações usam a
+    distribuição do método de cálculo e, sem nenhuma, o prazo_inicial do método.
+    Apenas latências de cálculos concluídos entram na distribuição (um timeout não
+    realimenta o próprio prazo). As janelas são gravadas entre execuções.
+    '''
+
+    def __init__(self, config:dict, caminho:str = os.path.join(PASTA_CACHE, 'prazos.json'), fator:float = FATOR,
+                 piso:float = PISO, teto:float = TETO, janela:int = JANELA):
+        self.caminho = caminho
+        self.fator = fator
+        self.piso = piso
+        self.teto = teto
+        self.janela = janela
+        self.metodo = chave_metodo(config)
+        self.inicial = prazo_inicial(config)
+        self.secoes = {}  # secao → [latências]
+        self.metodos = {}  # metodo → [latências]
+
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            self.secoes = dados.get('secoes', {})
+            self.metodos = dados.get('metodos', {})
+
+    def prazo_caso(self, secao:str|None = None) -> float:
+        '''
+        Prazo (s) de um caso da seção
+        '''
+        for latencias in (self.secoes.get(secao, []), self.metodos.get(self.metodo, [])):
+            if len(latencias) >= MIN_AMOSTRAS:
+                return min(self.teto, max(self.piso, self.fator*percentil(latencias, PERCENTIL)))
+        return self.inicial
+
+    def aplicar(self, lotes):
+        '''
+        Repassa os lotes (ou gerador de lotes) com o prazo por caso da seção em 'timeout_caso'
+        '''
+        for lote in lotes:
+            yield dict(lote, timeout_caso=self.prazo_caso(lote.get('secao')))
+
+    def observar(self, secao:str|None, latencias:list[float]):
+        '''
+        Incorpora latências por caso (s) de cálculos concluídos
+        '''
+        if not latencias:
+            return
+
+        chaves = [(self.metodos, self.metodo)]
+        if secao is not None:
+            chaves.append((self.secoes, secao))
+        for tabela, chave in chaves:
+            janela = tabela.setdefault(chave, [])
+            janela.extend(latencias)
+            del janela[:-self.janela]
+
+    def registrar(self, lote_data:dict, resultado:dict):
+        '''
+        Incorpora as latências de um lote concluído (resultado['latencias'] do processar_lote)
+        '''
+        latencias = [latencia for latencia in resultado.get('latencias') or [] if latencia is not None]
+        self.observar(lote_data.get('secao'), latencias)
+
+    def salvar(self):
+        salvar_json(self.caminho, {'secoes': self.secoes, 'metodos': self.metodos})
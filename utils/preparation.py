@@ -1,4 +1,6 @@
-from utils.extract import init_data
+from utils.extract import init_data, iterar_casos, config
+from utils.chaves import chave_armadura
+from utils.armazem import chave_caso
 
 def preparar_lotes(path, tamanho_lote=10, lim:float=100_000.00):
     """
@@ -7,6 +9,14 @@ def preparar_lotes(path, tamanho_lote=10, lim:float=100_000.00):
 
     esforcos, combine, frame = init_data(path, lim=lim)
 
+    return dividir_lotes(esforcos, combine, frame, tamanho_lote)
+
+
+def dividir_lotes(esforcos, combine, frame, tamanho_lote=10):
+    """
+    Divide os casos já extraídos pelo init_data em lotes menores
+    """
+
     indices = list(range(len(esforcos)))
 
     # Divide em lotes
@@ -21,3 +31,91 @@ def preparar_lotes(path, tamanho_lote=10, lim:float=100_000.00):
         lotes.append(lote)
     
     return lotes
+
+
+def preparar_lotes_streaming(path, tamanho_lote=10, lim:float=100_000.00):
+    """
+    Gera os lotes à medida que o Excel é lido, sem carregar a planilha inteira
+
+    Cada lote é entregue assim que completa, permitindo que o processamento
+    comece antes do fim da leitura
+    """
+
+    lote = {'indices': [], 'esforcos': [], 'combine': [], 'frame': []}
+
+    for indice, (frame, combinacao, esforco) in enumerate(iterar_casos(path, lim=lim)):
+        lote['indices'].append(indice)
+        lote['esforcos'].append(esforco)
+        lote['combine'].append(combinacao)
+        lote['frame'].append(frame)
+
+        if len(lote['indices']) == tamanho_lote:
+            yield lote
+            lote = {'indices': [], 'esforcos': [], 'combine': [], 'frame': []}
+
+    if lote['indices']:
+        yield lote
+
+
+def deduplicar_lotes(lotes, duplicatas, armadura, tamanho_lote=10):
+    """
+    Remove dos lotes os casos com esforços idênticos a um caso anterior da mesma seção
+
+    Os casos únicos são reagrupados em lotes de tamanho_lote, com a armadura e a chave da seção anexadas.
+    Cada índice removido é registrado em duplicatas (índice duplicado → índice calculado)
+    para que o FS seja replicado no consolidar_resultados.
+    """
+
+    secao = chave_armadura(config, armadura)
+    calculados = {}
+
+    lote = {'indices': [], 'esforcos': [], 'combine': [], 'frame': [], 'armadura': armadura, 'secao': secao}
+
+    for lote_original in lotes:
+        for indice, esforco, combinacao, frame in zip(lote_original['indices'], lote_original['esforcos'], lote_original['combine'], lote_original['frame']):
+            chave = (secao, tuple(esforco))
+
+            if chave in calculados:
+                duplicatas[indice] = calculados[chave]
+                continue
+
+            calculados[chave] = indice
+            lote['indices'].append(indice)
+            lote['esforcos'].append(esforco)
+            lote['combine'].append(combinacao)
+            lote['frame'].append(frame)
+
+            if len(lote['indices']) == tamanho_lote:
+                yield lote
+                lote = {'indices': [], 'esforcos': [], 'combine': [], 'frame': [], 'armadura': armadura, 'secao': secao}
+
+    if lote['indices']:
+        yield lote
+
+
+def filtrar_armazenados(lotes, armazem, armadura, reaproveitados):
+    """
+    Remove dos lotes os casos que já têm FS no armazém de resultados
+
+    Cada índice encontrado é registrado em reaproveitados (índice → FS armazenado)
+    """
+
+    secao = chave_armadura(config, armadura)
+
+    for lote in lotes:
+        chaves = [chave_caso(secao, esforco) for esforco in lote['esforcos']]
+        armazenados = armazem.buscar(chaves)
+
+        pendente = {'indices': [], 'esforcos': [], 'combine': [], 'frame': []}
+        for indice, esforco, combinacao, frame, chave in zip(lote['indices'], lote['esforcos'], lote['combine'], lote['frame'], chaves):
+            if chave in armazenados:
+                reaproveitados[indice] = armazenados[chave]
+                continue
+
+            pendente['indices'].append(indice)
+            pendente['esforcos'].append(esforco)
+            pendente['combine'].append(combinacao)
+            pendente['frame'].append(frame)
+
+        if pendente['indices']:
+            yield pendente
@@ -0,0 +1,95 @@
+import json
+import pickle
+import struct
+
+# Cabeçalho: tamanho da mensagem em bytes (uint32 big-endian)
+CABECALHO = struct.Struct('>I')
+
+
+def enviar_mensagem(fluxo, mensagem:dict) -> None:
+    '''
+    Escreve uma mensagem JSON enquadrada (tamanho + conteúdo) em um fluxo binário
+
+    Parameters
+    ----------
+    fluxo: fluxo binário de escrita (stdin do worker ou sys.stdout.buffer)
+    mensagem: dicionário serializável em JSON
+    '''
+    enviar_quadro(fluxo, json.dumps(mensagem).encode('utf-8'))
+
+
+def enviar_quadro(fluxo, conteudo:bytes) -> None:
+    '''
+    Escreve um quadro binário (tamanho + conteúdo) em um fluxo binário
+    '''
+    fluxo.write(CABECALHO.pack(len(conteudo)) + conteudo)
+    fluxo.flush()
+
+
+def _ler_exato(fluxo, n:int) -> bytes|None:
+    '''
+    Lê exatamente n bytes do fluxo, retornando None se o fluxo for fechado no meio
+    '''
+    partes = []
+    restante = n
+    while restante > 0:
+        parte = fluxo.read(restante)
+        if not parte:
+            return None
+        partes.append(parte)
+        restante -= len(parte)
+    return b''.join(partes)
+
+
+def receber_quadro(fluxo) -> bytes|None:
+    '''
+    Lê um quadro binário do fluxo
+
+    Returns
+    -------
+    Conteúdo do quadro ou None se o fluxo foi encerrado
+    '''
+    cabecalho = _ler_exato(fluxo, CABECALHO.size)
+    if cabecalho is None:
+        return None
+
+    return _ler_exato(fluxo, CABECALHO.unpack(cabecalho)[0])
+
+
+def receber_mensagem(fluxo) -> dict|None:
+    '''
+    Lê uma mensagem enquadrada do fluxo binário
+
+    Returns
+    -------
+    Dicionário da mensagem ou None se o fluxo foi encerrado
+    '''
+    conteudo = receber_quadro(fluxo)
+    if conteudo is None:
+        return None
+
+    return json.loads(conteudo.decode('utf-8'))
+
+
+def enviar_objeto(fluxo, objeto) -> None:
+    '''
+    Escreve um objeto Python (inclusive arrays NumPy) em um quadro binário (pickle)
+
+    Apenas para canais locais autenticados: o receptor desserializa o conteúdo.
+    '''
+    enviar_quadro(fluxo, pickle.dumps(objeto, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def receber_objeto(fluxo):
+    '''
+    Lê um objeto escrito por enviar_objeto
+
+    Returns
+    -------
+    O objeto ou None se o fluxo foi encerrado
+    '''
+    conteudo = receber_quadro(fluxo)
+    if conteudo is None:
+        return None
+
+    return pickle.loads(conteudo)
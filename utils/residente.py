@@ -0,0 +1,134 @@
+import subprocess
+import sys
+import queue
+from threading import Thread, RLock
+from utils.protocolo import enviar_mensagem, receber_mensagem
+from utils.misc import matar_arvore
+
+
+class WorkerResidente:
+    '''
+    Processo worker.py de longa duração que recebe lotes pelo stdin e devolve
+    resultados pelo stdout, mantendo a JVM ativa entre os lotes.
+
+    O processo é reciclado apenas após um travamento/queda ou depois de
+    max_casos cálculos. O encerramento pode vir de outra thread (a cópia mais
+    lenta de um pedaço no despacho dinâmico); a criação e a morte do processo
+    são serializadas por uma trava.
+    '''
+
+    def __init__(self, id_worker:int, max_casos:int = 5_000, timeout_inicio:float = 120):
+        self.id_worker = id_worker
+        self.max_casos = max_casos
+        self.timeout_inicio = timeout_inicio
+        self.processo = None
+        self.respostas = None
+        self.casos = 0
+        self._trava = RLock()
+
+    def iniciar(self):
+        '''
+        Inicia o processo residente e aguarda o engine ficar pronto
+        '''
+        with self._trava:
+            self.processo = subprocess.Popen(
+                [sys.executable, 'worker.py', '--residente'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+            self.casos = 0
+
+            # Uma única thread leitora por processo, para permitir timeout na resposta
+            self.respostas = queue.Queue()
+            Thread(target=self._ler_respostas, args=(self.processo.stdout, self.respostas), daemon=True).start()
+
+        pronto = self._aguardar(self.timeout_inicio)
+        if not pronto or pronto.get('tipo') != 'pronto':
+            self.encerrar(forcar=True)
+            raise RuntimeError(f"Worker {self.id_worker} não inicializou")
+
+    @staticmethod
+    def _ler_respostas(fluxo, respostas):
+        while True:
+            mensagem = receber_mensagem(fluxo)
+            respostas.put(mensagem)
+            if mensagem is None:
+                break
+
+    def _aguardar(self, timeout:float):
+        try:
+            return self.respostas.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def ativo(self) -> bool:
+        return self.processo is not None and self.processo.poll() is None
+
+    def executar(self, lote_data:dict, timeout:float) -> dict|None:
+        '''
+        Envia um lote ao worker e aguarda o resultado
+
+        Returns
+        -------
+        Resultado do lote ou None em caso de timeout, erro ou queda do processo
+        '''
+        if not self.ativo():
+            self.iniciar()
+
+        processo = self.processo
+        if processo is None:
+            # Encerrado por outra thread durante a inicialização
+            return None
+
+        try:
+            enviar_mensagem(processo.stdin, {'tipo': 'lote', 'lote': lote_data})
+        except OSError:
+            self.encerrar(forcar=True)
+            return None
+
+        resposta = self._aguardar(timeout)
+
+        if resposta is None:
+            # Timeout ou queda: o processo é descartado e recriado no próximo lote
+            self.encerrar(forcar=True)
+            return None
+
+        self.casos += len(lote_data['indices'])
+        if self.casos >= self.max_casos:
+            self.reciclar()
+
+        if resposta.get('tipo') != 'resultado':
+            print(f"Worker {self.id_worker} - ERRO: {resposta.get('mensagem')}")
+            return None
+        return resposta['resultado']
+
+    def reciclar(self):
+        '''
+        Encerra o processo atual; um novo é iniciado no próximo lote
+        '''
+        print(f"♻️  Reciclando worker {self.id_worker} após {self.casos} casos")
+        self.encerrar()
+
+    def encerrar(self, forcar:bool = False):
+        '''
+        Encerra o processo de forma limpa ou, se não responder (ou forcar=True), à força
+        '''
+        with self._trava:
+            if self.processo is None:
+                return
+
+            if forcar and self.processo.poll() is None:
+                # Mata o worker e o processo filho do seu engine
+                matar_arvore(self.processo.pid)
+                self.processo.wait()
+
+            if self.processo.poll() is None:
+                try:
+                    enviar_mensagem(self.processo.stdin, {'tipo': 'encerrar'})
+                    self.processo.stdin.close()
+                    self.processo.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    matar_arvore(self.processo.pid)
+                    self.processo.wait()
+
+            self.processo = None
@@ -0,0 +1,363 @@
+import os
+import sys
+import math
+import time
+import hmac
+import queue
+import shutil
+import socket
+import secrets
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from utils.protocolo import enviar_quadro, receber_quadro, enviar_objeto, receber_objeto
+from utils.misc import matar_arvore
+
+VAR_TOKEN = 'PCALC_TOKEN'  # Variável de ambiente com o token que autentica as conexões ao servidor
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Raiz do projeto (cwd do servidor)
+
+
+class EngineFalso:
+    '''
+    Engine sem JVM com o contrato do PCalcEngine, para testar o servidor, o cliente e os lotes.
+
+    Devolve o mesmo FS em todas as seções de cada combinação. Uma combinação com
+    N infinito trava o cálculo, simulando um CalculaEsforcos que nunca retorna.
+    '''
+
+    def __init__(self, fs:float = 1.0):
+        self.fs = fs
+        self.chamadas = 0
+
+    def calcular_envoltoria(self, esforcos=None, detalhe:str = 'completo', **armadura) -> dict:
+        esforcos = esforcos or [(0, 0, 0, 0, 0)]
+        if any(math.isinf(esforco[0]) for esforco in esforcos):
+            while True:
+                time.sleep(60)
+
+        self.chamadas += 1
+        return {'sucesso': True, 'fs_por_combinacao': [[self.fs]*11 for _ in esforcos]}
+
+    def estatisticas_cache(self) -> dict:
+        return {'hits': 0, 'misses': self.chamadas, 'taxa_acerto': 0.0}
+
+    def erros_ultimo_calculo(self) -> list:
+        return []
+
+
+def _novo_endereco() -> str:
+    '''
+    Endereço de um novo servidor: socket Unix em diretório privado ou, sem AF_UNIX (Windows), TCP local
+    '''
+    if hasattr(socket, 'AF_UNIX'):
+        return os.path.join(tempfile.mkdtemp(prefix='pcalc-'), 'engine.sock')
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as livre:
+        livre.bind(('127.0.0.1', 0))
+        return f"tcp:127.0.0.1:{livre.getsockname()[1]}"
+
+
+def _abrir_socket(endereco:str) -> tuple[socket.socket, str|tuple]:
+    '''
+    Socket (ainda não conectado) e endereço de conexão a partir do endereço do servidor
+    '''
+    if endereco.startswith('tcp:'):
+        _, host, porta = endereco.split(':')
+        return socket.socket(socket.AF_INET, socket.SOCK_STREAM), (host, int(porta))
+    return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM), endereco
+
+
+def _atender(fluxo, engine, token:bytes) -> bool:
+    '''
+    Atende uma conexão até o cliente desconectar
+
+    Returns
+    -------
+    False se o cliente pediu o encerramento do servidor
+    '''
+    # O token é conferido antes de qualquer desserialização
+    autenticacao = receber_quadro(fluxo)
+    if autenticacao is None or not hmac.compare_digest(autenticacao, token):
+        return True
+
+    while True:
+        pedido = receber_objeto(fluxo)
+        if pedido is None:
+            return True
+
+        metodo, kwargs = pedido
+        if metodo == 'encerrar':
+            return False
+
+        try:
+            resultado = getattr(engine, metodo)(**kwargs)
+            enviar_objeto(fluxo, ('ok', resultado, engine.estatisticas_cache()))
+        except Exception as e:
+            enviar_objeto(fluxo, ('erro', repr(e), engine.estatisticas_cache()))
+
+
+def servir(endereco:str, jar_path:str = r"engine/pcalc.jar", tamanho_cache:int = 16, falso:bool = False):
+    '''
+    Servidor do engine: hospeda uma JVM/PCalcEngine e atende lotes de casos pelo socket local
+
+    Atende um cliente por vez (cada servidor tem uma única JVM). Cada pedido é um
+    quadro binário (metodo, kwargs) e cada resposta (status, resultado, estatísticas
+    do cache), como no EngineProcesso. A primeira mensagem de cada conexão deve
+    ser o token de VAR_TOKEN.
+
+    falso: usa o EngineFalso em vez da JVM
+    '''
+    # Os prints do engine não devem se misturar ao stdout do processo pai
+    sys.stdout = sys.stderr
+    token = os.environ.get(VAR_TOKEN, '').encode('utf-8')
+
+    if falso:
+        engine = EngineFalso()
+    else:
+        from utils.wapper import PCalcEngine
+        engine = PCalcEngine(jar_path=jar_path, tamanho_cache=tamanho_cache)
+
+    servidor, destino = _abrir_socket(endereco)
+    servidor.bind(destino)
+    servidor.listen(1)
+
+    try:
+        ativo = True
+        while ativo:
+            conexao, _ = servidor.accept()
+            with conexao, conexao.makefile('rwb') as fluxo:
+                try:
+                    ativo = _atender(fluxo, engine, token)
+                except OSError:
+                    pass
+    finally:
+        servidor.close()
+        if not endereco.startswith('tcp:') and os.path.exists(endereco):
+            os.remove(endereco)
+
+
+class ClienteEngine:
+    '''
+    PCalcEngine hospedado em um servidor local (processo próprio) e chamado por socket.
+
+    Mesmo contrato do EngineProcesso: um cálculo que estoura o timeout mata apenas
+    o servidor deste engine, que é substituído por um novo; o estado do processo
+    chamador (orquestrador) é preservado.
+    '''
+
+    def __init__(self, jar_path:str = r"engine/pcalc.jar", tamanho_cache:int = 16, timeout_inicio:float = 120, falso:bool = False):
+        self.jar_path = jar_path
+        self.tamanho_cache = tamanho_cache
+        self.timeout_inicio = timeout_inicio
+        self.falso = falso
+        self.processo = None
+        self.endereco = None
+        self.conexao = None
+        self.fluxo = None
+
+        # Contadores do cache dos servidores já encerrados + do servidor atual
+        self._cache_encerrados = {'hits': 0, 'misses': 0}
+        self._cache_atual = {'hits': 0, 'misses': 0}
+        self.iniciar()
+
+    @property
+    def pid(self) -> int|None:
+        return self.processo.pid if self.processo else None
+
+    def iniciar(self):
+        '''
+        Inicia o servidor do engine (não bloqueia até a JVM subir)
+        '''
+        self.endereco = _novo_endereco()
+        self.token = secrets.token_hex(16)
+        argumentos = [sys.executable, '-m', 'utils.servidor_engine', self.endereco, self.jar_path, str(self.tamanho_cache)]
+        if self.falso:
+            argumentos.append('--falso')
+
+        self.processo = subprocess.Popen(argumentos, cwd=RAIZ, env=dict(os.environ, **{VAR_TOKEN: self.token}))
+        self.conexao = None
+        self.fluxo = None
+
+    def _conectar(self):
+        '''
+        Conecta ao servidor, aguardando a JVM subir (fora do timeout dos cálculos)
+        '''
+        limite = time.time() + self.timeout_inicio
+        while True:
+            if self.processo.poll() is not None:
+                self.matar()
+                raise RuntimeError("Servidor do engine encerrado durante a inicialização")
+
+            conexao, destino = _abrir_socket(self.endereco)
+            try:
+                conexao.connect(destino)
+                break
+            except OSError:
+                conexao.close()
+                if time.time() > limite:
+                    self.matar()
+                    raise TimeoutError(f"Engine não inicializou em {self.timeout_inicio:.0f}s")
+                time.sleep(0.1)
+
+        self.conexao = conexao
+        self.fluxo = conexao.makefile('rwb')
+        enviar_quadro(self.fluxo, self.token.encode('utf-8'))
+
+    def matar(self):
+        '''
+        Mata apenas o servidor deste engine
+        '''
+        if self.processo is None:
+            return
+
+        if self.processo.poll() is None:
+            matar_arvore(self.processo.pid)
+        self.processo.wait()
+        self._fechar_conexao()
+
+        for chave in self._cache_encerrados:
+            self._cache_encerrados[chave] += self._cache_atual[chave]
+        self._cache_atual = {'hits': 0, 'misses': 0}
+        self.processo = None
+
+    def _fechar_conexao(self):
+        for recurso in (self.fluxo, self.conexao):
+            if recurso is not None:
+                try:
+                    recurso.close()
+                except OSError:
+                    pass
+        self.fluxo = None
+        self.conexao = None
+
+        if not self.endereco.startswith('tcp:'):
+            shutil.rmtree(os.path.dirname(self.endereco), ignore_errors=True)
+
+    def reiniciar(self):
+        '''
+        Substitui o servidor do engine por um novo
+        '''
+        inicio = time.time()
+        self.matar()
+        self.iniciar()
+        print(f"    → Engine PID {self.pid} reiniciado ({(time.time() - inicio)*1000:.0f}ms)", flush=True)
+
+    def preparar(self):
+        '''
+        Garante um servidor vivo e conectado, fora do timeout (e do tempo medido) dos cálculos
+        '''
+        if self.processo is None or self.processo.poll() is not None:
+            self.reiniciar()
+        if self.conexao is None:
+            self._conectar()
+
+    def chamar(self, metodo:str, timeout:float|None = None, **kwargs):
+        '''
+        Executa um método do PCalcEngine no servidor
+
+        Raises
+        ------
+        TimeoutError: se o servidor não responder no prazo (o servidor é morto)
+        RuntimeError: se o engine lançar uma exceção ou o servidor morrer
+        '''
+        self.preparar()
+
+        pid = self.pid
+        self.conexao.settimeout(timeout)
+        try:
+            enviar_objeto(self.fluxo, (metodo, kwargs))
+            resposta = receber_objeto(self.fluxo)
+        except TimeoutError:
+            self.matar()
+            raise TimeoutError(f"Engine PID {pid} não respondeu em {timeout:.1f}s")
+        except OSError:
+            resposta = None
+
+        if resposta is None:
+            self.matar()
+            raise RuntimeError("Servidor do engine encerrado durante o cálculo")
+
+        status, resultado, self._cache_atual = resposta
+        if status != 'ok':
+            raise RuntimeError(resultado)
+        return resultado
+
+    def calcular_envoltoria(self, timeout:float|None = None, **kwargs):
+        '''
+        Mesmo contrato do PCalcEngine.calcular_envoltoria, com timeout rígido
+        '''
+        return self.chamar('calcular_envoltoria', timeout=timeout, **kwargs)
+
+    def estatisticas_cache(self) -> dict:
+        hits = self._cache_encerrados['hits'] + self._cache_atual['hits']
+        misses = self._cache_encerrados['misses'] + self._cache_atual['misses']
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'taxa_acerto': hits/total if total else 0.0
+        }
+
+    def encerrar(self):
+        '''
+        Encerra o servidor do engine de forma limpa
+        '''
+        if self.processo is None:
+            return
+
+        if self.conexao is not None and self.processo.poll() is None:
+            try:
+                self.conexao.settimeout(5)
+                enviar_objeto(self.fluxo, ('encerrar', {}))
+                self.processo.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self.matar()
+
+
+class PoolEngines:
+    '''
+    Pool de conexões com n servidores de engine, compartilhado entre as threads do orquestrador.
+
+    Cada engine atende um chamador por vez; os servidores sobem em paralelo na
+    criação do pool e um engine travado é substituído sem afetar os demais.
+    '''
+
+    def __init__(self, n_engines:int, **kwargs):
+        self.engines = [ClienteEngine(**kwargs) for _ in range(n_engines)]
+        self.livres = queue.Queue()
+        for engine in self.engines:
+            self.livres.put(engine)
+
+    @contextmanager
+    def engine(self):
+        '''
+        Empresta um engine livre (bloqueia até haver um)
+        '''
+        engine = self.livres.get()
+        try:
+            yield engine
+        finally:
+            self.livres.put(engine)
+
+    def calcular_envoltoria(self, timeout:float|None = None, **kwargs):
+        with self.engine() as engine:
+            return engine.calcular_envoltoria(timeout=timeout, **kwargs)
+
+    def encerrar(self):
+        for engine in self.engines:
+            engine.encerrar()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: python -m utils.servidor_engine <endereco> [jar_path] [tamanho_cache] [--falso]")
+        sys.exit(1)
+
+    argumentos = [argumento for argumento in sys.argv[1:] if argumento != '--falso']
+    servir(
+        argumentos[0],
+        jar_path=argumentos[1] if len(argumentos) > 1 else r"engine/pcalc.jar",
+        tamanho_cache=int(argumentos[2]) if len(argumentos) > 2 else 16,
+        falso='--falso' in sys.argv,
+    )
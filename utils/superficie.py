@@ -0,0 +1,231 @@
+import math
+import os
+import numpy as np
+from utils.chaves import chave_armadura, _hash
+from utils.triagem import amostrar_curva, faixa_normal, fator_cargas, excentricidade_minima
+
+PASTA_SUPERFICIES = 'superficies'
+N_NIVEIS = 401  # Níveis de N da superfície
+N_DIRECOES = 360  # Direções do momento por nível
+NIVEIS_POR_CHAMADA = 50  # Níveis de N (curvas Mr) calculados por chamada ao engine
+TIMEOUT_CHAMADA = 60.0  # Timeout (s) de cada chamada de curvas Mr ao engine
+FS_MAXIMO = 1000.0  # FS de um caso sem esforço (N e M nulos)
+
+
+class SuperficieInteracao:
+    '''
+    Superfície de interação N x teta → Mr de uma seção armada, amostrada em grade regular.
+
+    Os níveis de N são igualmente espaçados e as direções do momento cobrem a volta
+    completa, de modo que a consulta é uma interpolação bilinear por índice, sem
+    busca. Níveis além da resistência da seção ficam como NaN.
+
+    fator_cargas e excentricidade_minima (do config) são usados apenas pelo fs_casos,
+    que recebe os esforços característicos do export.
+    '''
+
+    def __init__(self, niveis:np.ndarray, raios:np.ndarray, chave:str = '',
+                 fator_cargas:float = 1.0, excentricidade_minima:float = 0.0):
+        self.niveis = np.asarray(niveis, dtype=np.float64)
+        self.raios = np.asarray(raios, dtype=np.float32)
+        self.chave = chave
+        self.fator_cargas = fator_cargas
+        self.excentricidade_minima = excentricidade_minima
+
+    def _posicao_normal(self, normal:np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        Índice do nível inferior, posição fracionária entre níveis e máscara fora da faixa de N
+        '''
+        n_niveis = self.raios.shape[0]
+        u = (normal - self.niveis[0]) / (self.niveis[-1] - self.niveis[0]) * (n_niveis - 1)
+        fora = (u < 0) | (u > n_niveis - 1)
+        i = np.clip(np.floor(u).astype(np.int64), 0, n_niveis - 2)
+        return i, np.clip(u - i, 0, 1), fora
+
+    def momento_resistente(self, normal:np.ndarray, phi:np.ndarray) -> np.ndarray:
+        '''
+        Mr interpolado para cada par (N, direção do momento); NaN fora da faixa de N
+        '''
+        normal = np.asarray(normal, dtype=np.float64)
+        n_direcoes = self.raios.shape[1]
+
+        # Posição fracionária na grade de N
+        i, u, fora = self._posicao_normal(normal)
+
+        # Posição fracionária na grade de direções (periódica)
+        v = np.mod(np.asarray(phi, dtype=np.float64), 2*math.pi) / (2*math.pi) * n_direcoes
+        j = np.floor(v).astype(np.int64) % n_direcoes
+        v = v - np.floor(v)
+        j2 = (j + 1) % n_direcoes
+
+        raios = self.raios
+        mr = ((1 - u)*((1 - v)*raios[i, j] + v*raios[i, j2])
+              + u*((1 - v)*raios[i + 1, j] + v*raios[i + 1, j2]))
+        return np.where(fora, np.nan, mr)
+
+    def momento_resistente_minimo(self, normal:np.ndarray) -> np.ndarray:
+        '''
+        Menor Mr em qualquer direção para cada N (interpolado entre níveis); NaN fora da faixa de N
+        '''
+        normal = np.asarray(normal, dtype=np.float64)
+        i, u, fora = self._posicao_normal(normal)
+        mr = (1 - u)*self.raios[i].min(axis=1) + u*self.raios[i + 1].min(axis=1)
+        return np.where(fora, np.nan, mr)
+
+    def fs(self, normal:np.ndarray, mx:np.ndarray, my:np.ndarray) -> np.ndarray:
+        '''
+        FS de 1ª ordem (Mr / M a N constante) de cada ponto (N, Mx, My), vetorizado
+
+        Equivale ao FS da seção única (vinculacao 0, L 0), sem efeitos de 2ª ordem.
+        Momento nulo resulta em inf; N fora da faixa da superfície em NaN.
+        '''
+        mx = np.asarray(mx, dtype=np.float64)
+        my = np.asarray(my, dtype=np.float64)
+        momento = np.hypot(mx, my)
+        mr = self.momento_resistente(normal, np.arctan2(my, mx))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(momento > 0, mr / momento, np.where(np.isnan(mr), np.nan, np.inf))
+
+    def fs_casos(self, esforcos) -> np.ndarray:
+        '''
+        FS de seção única (vinculacao 0, L 0) dos casos do init_data
+
+        Os esforços característicos são majorados por fator_cargas e o momento é
+        limitado inferiormente pelo mínimo N·excentricidade_minima, com o menor Mr do
+        nível de N (qualquer direção); o FS é sempre finito dentro da faixa de N
+        (FS_MAXIMO para um caso sem esforço).
+
+        Parameters
+        ----------
+        esforcos: casos (N, Mx_topo, My_topo, Mx_base, My_base)
+
+        Returns
+        -------
+        Array (n_casos, 2) com o FS na base e no topo; NaN para N fora da faixa da superfície
+        '''
+        esforcos = np.asarray(esforcos, dtype=np.float64).reshape(-1, 5) * self.fator_cargas
+        normal = esforcos[:, 0]
+        minimo = np.abs(normal)*self.excentricidade_minima
+        mr_minimo = self.momento_resistente_minimo(normal)
+
+        colunas = []
+        for mx, my in ((esforcos[:, 3], esforcos[:, 4]), (esforcos[:, 1], esforcos[:, 2])):
+            momento = np.hypot(mx, my)
+            mr = np.where(momento < minimo, mr_minimo, self.momento_resistente(normal, np.arctan2(my, mx)))
+            solicitante = np.maximum(momento, minimo)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fs = np.where(solicitante > 0, mr / solicitante, np.where(np.isnan(mr), np.nan, FS_MAXIMO))
+            colunas.append(np.minimum(fs, FS_MAXIMO))
+        return np.column_stack(colunas)
+
+    def salvar(self, caminho:str) -> str:
+        np.savez_compressed(caminho, niveis=self.niveis, raios=self.raios, chave=np.array(self.chave),
+                            fator_cargas=self.fator_cargas, excentricidade_minima=self.excentricidade_minima)
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho:str) -> 'SuperficieInteracao':
+        with np.load(caminho) as arquivo:
+            return cls(arquivo['niveis'], arquivo['raios'], str(arquivo['chave']),
+                       float(arquivo['fator_cargas']), float(arquivo['excentricidade_minima']))
+
+
+def construir_superficie(config:dict, armadura:dict, engine=None, n_niveis:int = N_NIVEIS,
+                         n_direcoes:int = N_DIRECOES, niveis_por_chamada:int = NIVEIS_POR_CHAMADA,
+                         timeout:float = TIMEOUT_CHAMADA) -> SuperficieInteracao|None:
+    '''
+    Calcula a superfície de interação da seção com CurvaMr em n_niveis níveis de N
+
+    Os níveis cobrem a faixa de N resistente de cálculo (faixa_normal) e cada chamada
+    executa apenas a CurvaMr (calcular_curvas_mr, sem 2ª ordem), com timeout rígido.
+
+    Parameters
+    ----------
+    config: configuração carregada do config.yaml
+    armadura: argumentos de armadura do calcular_envoltoria
+    engine: EngineProcesso/ClienteEngine; criado (e encerrado) aqui se None
+    timeout: tempo máximo (s) de cada chamada ao engine
+
+    Returns
+    -------
+    Superfície da seção ou None se alguma chamada travou ou falhou
+    '''
+    minimo, maximo = faixa_normal(config, armadura)
+    niveis = np.linspace(minimo, maximo, n_niveis)
+
+    engine_proprio = engine is None
+    if engine_proprio:
+        from utils.engine_processo import EngineProcesso
+        engine = EngineProcesso()
+
+    raios = []
+    try:
+        for inicio in range(0, n_niveis, niveis_por_chamada):
+            parte = niveis[inicio:inicio+niveis_por_chamada]
+            print(f"📈 Curvas Mr: níveis {inicio + 1} a {inicio + len(parte)} de {n_niveis}")
+            curvas = engine.chamar('calcular_curvas_mr', timeout=timeout, niveis_n=parte.tolist(), **armadura)
+            if len(curvas) != len(parte):
+                raise RuntimeError(f"engine devolveu {len(curvas)} de {len(parte)} curvas Mr")
+            raios.extend(amostrar_curva(curva, n_direcoes) for curva in curvas)
+    except (TimeoutError, RuntimeError) as e:
+        print(f"⚠️  Superfície de interação não calculada ({e})")
+        return None
+    finally:
+        if engine_proprio:
+            engine.encerrar()
+
+    return SuperficieInteracao(niveis, np.vstack(raios), chave_armadura(config, armadura),
+                               fator_cargas(config), excentricidade_minima(config))
+
+
+def carregar_superficie(config:dict, armadura:dict, engine=None, n_niveis:int = N_NIVEIS,
+                        n_direcoes:int = N_DIRECOES, pasta:str = PASTA_SUPERFICIES) -> SuperficieInteracao|None:
+    '''
+    Superfície da seção armada lida de pasta; construída e salva na primeira vez
+
+    O arquivo é identificado pela seção armada (materiais, geometria, armadura) e pela resolução da grade.
+    Retorna None se a superfície não pôde ser calculada.
+    '''
+    chave = _hash([chave_armadura(config, armadura), n_niveis, n_direcoes, 'curvas_mr_nrd'])
+    caminho = os.path.join(pasta, f'{chave[:16]}.npz')
+
+    if os.path.exists(caminho):
+        return SuperficieInteracao.carregar(caminho)
+
+    superficie = construir_superficie(config, armadura, engine=engine, n_niveis=n_niveis, n_direcoes=n_direcoes)
+    if superficie is None:
+        return None
+
+    os.makedirs(pasta, exist_ok=True)
+    superficie.salvar(caminho)
+    print(f"💾 Superfície salva em {caminho} ({os.path.getsize(caminho)/1024:.0f} KB)")
+    return superficie
+
+
+def resolver_lotes(lotes, superficie:SuperficieInteracao, resolvidos:dict):
+    '''
+    Calcula pela superfície o FS dos casos de seção única (elemento.L = 0) e os remove dos lotes
+
+    Casos com N fora da faixa da superfície seguem para o engine.
+
+    Parameters
+    ----------
+    lotes: lotes (ou gerador de lotes)
+    superficie: superfície da seção armada dos lotes
+    resolvidos: preenchido com índice → FS (base, topo)
+    '''
+    for lote in lotes:
+        fs = superficie.fs_casos(lote['esforcos'])
+        definido = np.isfinite(fs).all(axis=1)
+
+        pendente = {chave: [] for chave in ('indices', 'esforcos', 'combine', 'frame')}
+        for posicao, indice in enumerate(lote['indices']):
+            if definido[posicao]:
+                resolvidos[indice] = np.round(fs[posicao], 4).tolist()
+                continue
+            for chave in pendente:
+                pendente[chave].append(lote[chave][posicao])
+
+        if pendente['indices']:
+            yield dict(lote, **pendente)
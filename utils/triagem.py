@@ -0,0 +1,353 @@
+import math
+import os
+import numpy as np
+import pandas as pd
+from utils.chaves import chave_armadura, _hash
+from utils.persistencia import PASTA_CACHE
+
+N_NIVEIS = 41  # Níveis de N das curvas Mr da triagem
+N_DIRECOES = 72  # Direções do momento em que cada curva Mr é amostrada
+MARGEM_SEGURA = 2.0  # FS de 1ª ordem acima do qual o caso é dado como verificado
+MARGEM_FALHA = 0.5  # FS de 1ª ordem abaixo do qual o caso é dado como não verificado
+TIMEOUT_CURVAS = 60.0  # Timeout (s) do cálculo das curvas Mr de uma seção
+DEFORMACAO_COMPRESSAO = 0.002  # Encurtamento do aço na compressão centrada
+KN_TF = 9.80665
+
+
+def _cruzamento(p1x, p1y, p2x, p2y, phi):
+    '''
+    Distância da origem ao segmento P1-P2 na direção phi (vetorizado)
+
+    Para uma curva convexa que contém a origem, o segmento entre dois pontos da
+    curva fica no seu interior: o valor é um limite inferior do raio da curva.
+    '''
+    ux, uy = np.cos(phi), np.sin(phi)
+    dx, dy = p2x - p1x, p2y - p1y
+    denominador = ux*dy - uy*dx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raio = (p1x*dy - p1y*dx) / denominador
+    return np.where(np.abs(denominador) > 1e-12, raio, np.minimum(np.hypot(p1x, p1y), np.hypot(p2x, p2y)))
+
+
+def amostrar_curva(curva:np.ndarray, n_direcoes:int = N_DIRECOES) -> np.ndarray:
+    '''
+    Raio (momento resistente) de uma curva Mr em n_direcoes direções igualmente espaçadas
+
+    Parameters
+    ----------
+    curva: array (n, 4) nas COLUNAS_CURVA_MR (nrd_tf, teta_rad, mx_tfm, my_tfm)
+
+    Returns
+    -------
+    Array (n_direcoes,) com o raio conservador em cada direção; NaN se a curva não tiver pontos suficientes
+    '''
+    if len(curva) < 3:
+        return np.full(n_direcoes, np.nan)
+
+    mx, my = curva[:, 2], curva[:, 3]
+    angulos = np.mod(np.arctan2(my, mx), 2*math.pi)
+    ordem = np.argsort(angulos)
+    angulos, mx, my = angulos[ordem], mx[ordem], my[ordem]
+
+    # Fecha a curva repetindo o primeiro ponto uma volta à frente
+    angulos = np.append(angulos, angulos[0] + 2*math.pi)
+    mx, my = np.append(mx, mx[0]), np.append(my, my[0])
+
+    phi = np.arange(n_direcoes) * 2*math.pi / n_direcoes
+    phi = np.where(phi < angulos[0], phi + 2*math.pi, phi)
+    j = np.clip(np.searchsorted(angulos, phi, side='right') - 1, 0, len(angulos) - 2)
+    return _cruzamento(mx[j], my[j], mx[j+1], my[j+1], phi)
+
+
+def capacidade(niveis:np.ndarray, raios:np.ndarray, normal:np.ndarray, phi:np.ndarray) -> np.ndarray:
+    '''
+    Momento resistente conservador para cada par (N, direção do momento)
+
+    Entre dois níveis de N toma o menor dos dois (o diagrama N-M é côncavo) e, entre
+    duas direções amostradas, a corda entre elas. Fora da faixa de níveis retorna NaN.
+
+    Parameters
+    ----------
+    niveis: níveis de N (tf), crescentes
+    raios: array (n_niveis, n_direcoes) do amostrar_curva
+    normal: esforço normal de cada ponto (tf)
+    phi: direção do momento de cada ponto (rad)
+    '''
+    normal = np.asarray(normal, dtype=float)
+    phi = np.mod(np.asarray(phi, dtype=float), 2*math.pi)
+    n_direcoes = raios.shape[1]
+    passo = 2*math.pi / n_direcoes
+
+    i = np.clip(np.searchsorted(niveis, normal, side='right') - 1, 0, len(niveis) - 2)
+    fora = (normal < niveis[0]) | (normal > niveis[-1])
+
+    j1 = np.floor(phi / passo).astype(int) % n_direcoes
+    j2 = (j1 + 1) % n_direcoes
+    a1, a2 = j1*passo, j2*passo
+
+    resultado = []
+    for nivel in (i, i + 1):
+        r1, r2 = raios[nivel, j1], raios[nivel, j2]
+        resultado.append(_cruzamento(r1*np.cos(a1), r1*np.sin(a1), r2*np.cos(a2), r2*np.sin(a2), phi))
+
+    # np.minimum propaga o NaN de um nível sem curva
+    return np.where(fora, np.nan, np.minimum(resultado[0], resultado[1]))
+
+
+def capacidade_minima(niveis:np.ndarray, raios:np.ndarray, normal:np.ndarray) -> np.ndarray:
+    '''
+    Menor momento resistente em qualquer direção para cada N (limite inferior pela corda entre direções)
+    '''
+    normal = np.asarray(normal, dtype=float)
+    i = np.clip(np.searchsorted(niveis, normal, side='right') - 1, 0, len(niveis) - 2)
+    fora = (normal < niveis[0]) | (normal > niveis[-1])
+
+    minimo = np.minimum(raios[i].min(axis=1), raios[i + 1].min(axis=1)) * math.cos(math.pi / raios.shape[1])
+    return np.where(fora, np.nan, minimo)
+
+
+def fator_cargas(config:dict) -> float:
+    '''
+    Fator que leva os esforços característicos do export aos de cálculo do engine (γf·γf3)
+    '''
+    return config['coef']['gamma_f'] * config['coef']['gamma_3']
+
+
+def excentricidade_minima(config:dict) -> float:
+    '''
+    Excentricidade (m) do momento mínimo de 1ª ordem: 0,015 + 0,03 h, com a menor dimensão h em m
+    '''
+    elemento = config['elemento']
+    h = elemento['dim_x'] if 'circular' in elemento['secao']['tipo_secao'].lower() else min(elemento['dim_x'], elemento['dim_y'])
+    return 0.015 + 0.03*h/100
+
+
+def faixa_normal(config:dict, armadura:dict) -> tuple[float, float]:
+    '''
+    Faixa de N resistente de cálculo (tf) da seção: compressão (negativa) e tração
+
+    Usa as resistências de cálculo (fck/γc, fyk/γs e, na compressão, a tensão do aço
+    no encurtamento de 2‰), de modo que os níveis de N ficam dentro da capacidade.
+    '''
+    elemento = config['elemento']
+    tipo_secao = elemento['secao']['tipo_secao'].lower()
+
+    if 'circular' in tipo_secao:
+        area_concreto = math.pi * elemento['dim_x']**2 / 4
+        if 'vazada' in tipo_secao:
+            area_concreto -= math.pi * elemento['hole']**2 / 4
+        n_barras = armadura.get('n_barras') or armadura.get('nx', 3)
+    else:
+        area_concreto = elemento['dim_x'] * elemento['dim_y']
+        nx, ny = armadura.get('nx', 3), armadura.get('ny', 3)
+        n_barras = 2*nx + 2*max(ny - 2, 0)
+
+    fi = armadura.get('diametro_mm', 12.5) / 10
+    area_aco = n_barras * math.pi * fi**2 / 4
+
+    # MPa → kN/cm² → tf
+    fcd = config['materials']['concrete']['fck'] / 10 / config['coef']['gamma_c']
+    fyd = config['materials']['steel']['fyk'] / 10 / config['coef']['gamma_s']
+    sigma_compressao = min(fyd, DEFORMACAO_COMPRESSAO*config['materials']['steel']['mod_es']*100)  # GPa → kN/cm²
+    compressao = (0.85*fcd*area_concreto + sigma_compressao*area_aco) / KN_TF
+    tracao = fyd*area_aco / KN_TF
+    return -compressao, tracao
+
+
+class TriagemMr:
+    '''
+    Triagem dos casos pelas curvas Mr da seção, sem o cálculo de 2ª ordem.
+
+    O FS de 1ª ordem de cada seção ao longo da barra é a razão entre o momento
+    resistente conservador (capacidade) e o momento solicitante de cálculo (esforços
+    do export majorados por γf·γf3, como no engine), interpolado
+    linearmente entre base e topo e limitado inferiormente pelo momento mínimo.
+    Apenas os casos longe da superfície (acima de margem_segura ou abaixo de
+    margem_falha) são classificados; os demais seguem para o engine. Os efeitos
+    de 2ª ordem ficam cobertos pela margem, que deve ser calibrada com o
+    relatório de validação (relatorio_triagem).
+    '''
+
+    def __init__(self, niveis:np.ndarray, raios:np.ndarray, config:dict,
+                 margem_segura:float = MARGEM_SEGURA, margem_falha:float = MARGEM_FALHA):
+        self.niveis = np.asarray(niveis, dtype=float)
+        self.raios = np.asarray(raios, dtype=float)
+        self.margem_segura = margem_segura
+        self.margem_falha = margem_falha
+
+        # Esforços característicos → de cálculo
+        self.fator_cargas = fator_cargas(config)
+
+        # Mesma quantidade de seções ao longo da barra que o engine devolve
+        self.n_secoes = 3 if config['method']['2_ordem'] == 3 else 11
+
+        # Momento mínimo de 1ª ordem: N (0,015 + 0,03 h)
+        self.excentricidade_minima = excentricidade_minima(config)
+
+    def classificar(self, esforcos:list[tuple]) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Classifica um conjunto de casos
+
+        Parameters
+        ----------
+        esforcos: casos (N, Mx_topo, My_topo, Mx_base, My_base)
+
+        Returns
+        -------
+        Classe de cada caso ('segura', 'falha' ou '' para os que seguem ao engine) e
+        array (n_casos, n_secoes) com os FS de 1ª ordem
+        '''
+        esforcos = np.asarray(esforcos, dtype=float).reshape(-1, 5) * self.fator_cargas
+        normal = esforcos[:, 0]
+
+        # Momentos nas seções, da base (0) ao topo (L)
+        x = np.linspace(0, 1, self.n_secoes)
+        mx = esforcos[:, [3]] + (esforcos[:, [1]] - esforcos[:, [3]])*x
+        my = esforcos[:, [4]] + (esforcos[:, [2]] - esforcos[:, [4]])*x
+        momento = np.hypot(mx, my)
+        minimo = np.abs(normal)[:, None]*self.excentricidade_minima
+
+        # Abaixo do mínimo vale a direção mais desfavorável do nível de N
+        capacidade_direcao = capacidade(self.niveis, self.raios, np.repeat(normal, self.n_secoes), np.arctan2(my, mx).ravel())
+        capacidade_direcao = capacidade_direcao.reshape(momento.shape)
+        resistente = np.where(momento < minimo, capacidade_minima(self.niveis, self.raios, normal)[:, None], capacidade_direcao)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fs = resistente / np.maximum(momento, minimo)
+
+        fs_min = fs.min(axis=1)
+        definido = np.isfinite(fs).all(axis=1)
+        classes = np.full(len(esforcos), '', dtype=object)
+        classes[definido & (fs_min >= self.margem_segura)] = 'segura'
+        classes[definido & (fs_min <= self.margem_falha)] = 'falha'
+        return classes, fs
+
+    def salvar(self, caminho:str):
+        np.savez(caminho, niveis=self.niveis, raios=self.raios)
+
+
+def carregar_triagem(config:dict, armadura:dict, engine=None, n_niveis:int = N_NIVEIS,
+                     n_direcoes:int = N_DIRECOES, timeout:float = TIMEOUT_CURVAS, **margens) -> TriagemMr|None:
+    '''
+    Monta a triagem da seção a partir das curvas Mr, com cache em disco
+
+    As curvas de todos os níveis de N (faixa_normal) são calculadas em uma única
+    chamada ao engine que executa apenas a CurvaMr (calcular_curvas_mr, sem
+    2ª ordem), com timeout rígido, e guardadas em .cache; execuções seguintes
+    com a mesma seção armada não tocam no engine.
+
+    Parameters
+    ----------
+    config: configuração carregada do config.yaml
+    armadura: argumentos de armadura do calcular_envoltoria
+    engine: EngineProcesso/ClienteEngine; criado (e encerrado) aqui se None e o cache não existir
+    timeout: tempo máximo (s) do cálculo das curvas
+    margens: margem_segura e margem_falha do TriagemMr
+
+    Returns
+    -------
+    TriagemMr da seção ou None se as curvas não puderam ser calculadas (timeout ou erro do engine)
+    '''
+    chave = _hash([chave_armadura(config, armadura), n_niveis, n_direcoes, 'curvas_mr_nrd'])
+    os.makedirs(PASTA_CACHE, exist_ok=True)
+    caminho = os.path.join(PASTA_CACHE, f'triagem-{chave[:16]}.npz')
+
+    if os.path.exists(caminho):
+        with np.load(caminho) as arquivo:
+            return TriagemMr(arquivo['niveis'], arquivo['raios'], config, **margens)
+
+    minimo, maximo = faixa_normal(config, armadura)
+    niveis = np.linspace(minimo, maximo, n_niveis)
+
+    engine_proprio = engine is None
+    if engine_proprio:
+        from utils.engine_processo import EngineProcesso
+        engine = EngineProcesso()
+
+    try:
+        print(f"📈 Calculando curvas Mr da triagem ({n_niveis} níveis de N)...")
+        curvas = engine.chamar('calcular_curvas_mr', timeout=timeout, niveis_n=niveis.tolist(), **armadura)
+    except (TimeoutError, RuntimeError) as e:
+        print(f"⚠️  Curvas Mr da triagem não calculadas ({e}) - triagem desativada")
+        return None
+    finally:
+        if engine_proprio:
+            engine.encerrar()
+
+    if len(curvas) != n_niveis:
+        print(f"⚠️  Engine devolveu {len(curvas)} de {n_niveis} curvas Mr - triagem desativada")
+        return None
+
+    raios = np.vstack([amostrar_curva(curva, n_direcoes) for curva in curvas])
+    triagem = TriagemMr(niveis, raios, config, **margens)
+    triagem.salvar(caminho)
+    return triagem
+
+
+def triar_lotes(lotes, triagem:TriagemMr, triados:dict, calcular_triados:bool = False):
+    '''
+    Remove dos lotes os casos classificados pela triagem
+
+    Parameters
+    ----------
+    lotes: lotes (ou gerador de lotes)
+    triagem: TriagemMr da seção
+    triados: preenchido com índice → (classe, FS de 1ª ordem por seção)
+    calcular_triados: mantém os casos triados nos lotes (validação contra o cálculo exato)
+    '''
+    for lote in lotes:
+        classes, fs = triagem.classificar(lote['esforcos'])
+
+        pendente = {'indices': [], 'esforcos': [], 'combine': [], 'frame': []}
+        for posicao, (indice, esforco, combinacao, frame) in enumerate(zip(lote['indices'], lote['esforcos'], lote['combine'], lote['frame'])):
+            if classes[posicao]:
+                triados[indice] = (classes[posicao], np.round(fs[posicao], 4).tolist())
+                if not calcular_triados:
+                    continue
+
+            pendente['indices'].append(indice)
+            pendente['esforcos'].append(esforco)
+            pendente['combine'].append(combinacao)
+            pendente['frame'].append(frame)
+
+        if pendente['indices']:
+            yield pendente
+
+
+def relatorio_triagem(triados:dict, fs_exatos:list[list], name:str = 'saida', indices:list[int]|None = None) -> pd.DataFrame:
+    '''
+    Compara o FS da triagem com o FS exato dos casos triados e exporta TRIAGEM-<name>.xlsx
+
+    Parameters
+    ----------
+    triados: índice → (classe, FS da triagem) (triar_lotes com calcular_triados=True)
+    fs_exatos: FS de todos os casos (consolidar_resultados)
+    indices: índice de cada posição de fs_exatos (consolidar_resultados); None se as
+    posições forem os próprios índices
+    '''
+    posicao = {indice: i for i, indice in enumerate(indices)} if indices is not None else None
+
+    linhas = []
+    for indice, (classe, fs_triagem) in sorted(triados.items()):
+        exato = fs_exatos[posicao[indice] if posicao is not None else indice]
+        numerico = all(isinstance(valor, (int, float)) for valor in exato)
+        fs_exato = min(exato) if numerico else math.nan
+        verificado = numerico and fs_exato > 1
+
+        linhas.append({
+            'indice': indice,
+            'classe': classe,
+            'fs_triagem': min(fs_triagem),
+            'fs_exato': fs_exato,
+            'razao': min(fs_triagem)/fs_exato if numerico and fs_exato else math.nan,
+            # Triagem contrária ao cálculo exato
+            'divergente': (classe == 'segura') != verificado if numerico else True,
+        })
+
+    df = pd.DataFrame(linhas, columns=['indice', 'classe', 'fs_triagem', 'fs_exato', 'razao', 'divergente'])
+    df.to_excel(f'TRIAGEM-{name}.xlsx', index=False)
+
+    for classe, grupo in df.groupby('classe'):
+        print(f"🔬 Triagem '{classe}': {len(grupo)} casos, {int(grupo['divergente'].sum())} divergentes, "
+              f"razão triagem/exato {grupo['razao'].min():.3f} a {grupo['razao'].max():.3f}")
+    return df
@@ -0,0 +1,265 @@
+import math
+import os
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from utils.extract import config
+from utils.chaves import chave_armadura
+from utils.execucao import executar_lotes, consolidar_resultados, criar_workers, encerrar_workers
+from utils.prazos import PoliticaPrazos
+
+
+def armadura_celula(diametro_mm:float, quantidade:int, d_linha:float = 8) -> dict:
+    '''
+    Argumentos de armadura de uma célula da varredura (mesma disposição do run_analysis)
+
+    Parameters
+    ----------
+    diametro_mm: diâmetro das barras (mm)
+    quantidade: número de barras (nx na retangular, n_barras na circular)
+    d_linha: distância do CG da barra à face (cm)
+    '''
+    return {'diametro_mm': diametro_mm, 'nx': quantidade, 'ny': 0, 'n_barras': quantidade, 'd_linha': d_linha}
+
+
+def fs_minimo(fs_casos:list[list]) -> float:
+    '''
+    FS governante de uma célula: menor FS entre todas as seções de todos os casos
+
+    Retorna NaN se algum caso falhou, para que a célula nunca seja tomada como verificada
+    '''
+    minimos = []
+    for fs in fs_casos:
+        if fs is None or any(not isinstance(valor, (int, float)) for valor in fs):
+            return math.nan
+        minimos.append(min(fs))
+    return min(minimos) if minimos else math.nan
+
+
+def avaliar_celulas(celulas:list[tuple[float, int]], esforcos:list[tuple], d_linha:float = 8,
+                    workers=None, n_processos:int|None = None, tamanho_lote:int = 100,
+                    prazos:PoliticaPrazos|None = None) -> dict[tuple[float, int], float]:
+    '''
+    Calcula em paralelo o FS governante de cada célula (diâmetro, quantidade) para todos os esforços
+
+    Cada célula vira um ou mais lotes com a sua armadura; os casos de uma mesma
+    célula compartilham a seção em cache do engine do worker. O prazo por caso de
+    cada lote vem da PoliticaPrazos pela seção da célula (prazo_inicial do método
+    de cálculo, ex.: 2ª ordem, quando a seção não tem histórico), como no orquestrador.
+
+    Parameters
+    ----------
+    celulas: lista de (diametro_mm, quantidade)
+    esforcos: casos de carregamento (N, Mx_topo, My_topo, Mx_base, My_base)
+    d_linha: distância do CG da barra à face (cm)
+    workers: pool de workers residentes reaproveitado (criar_workers); criado e encerrado aqui se None
+    n_processos: workers simultâneos
+    tamanho_lote: casos por lote (células com muitos casos são divididas entre workers)
+    prazos: PoliticaPrazos atualizada com as latências das células; criada (e gravada) aqui se None
+    '''
+    n_processos = n_processos or os.cpu_count() or 1
+    esforcos = [tuple(esforco) for esforco in esforcos]
+    prazos_proprios = prazos is None
+    if prazos_proprios:
+        prazos = PoliticaPrazos(config)
+
+    lotes = []
+    origem = {}  # índice global -> célula
+    for celula in celulas:
+        armadura = armadura_celula(*celula, d_linha=d_linha)
+        secao = chave_armadura(config, armadura)
+        for inicio in range(0, len(esforcos), tamanho_lote):
+            parte = esforcos[inicio:inicio+tamanho_lote]
+            indices = list(range(len(origem), len(origem) + len(parte)))
+            origem.update((i, celula) for i in indices)
+            lotes.append({
+                'indices': indices,
+                'esforcos': parte,
+                'combine': ['']*len(parte),
+                'frame': ['']*len(parte),
+                'armadura': armadura,
+                'secao': secao,
+                'timeout_caso': prazos.prazo_caso(secao),
+            })
+
+    pool_proprio = workers is None
+    if pool_proprio:
+        workers = criar_workers(n_processos)
+
+    try:
+        resultados_lotes = executar_lotes(lotes, n_processos=n_processos, workers=workers, prazos=prazos)
+    finally:
+        if pool_proprio:
+            encerrar_workers(workers)
+        if prazos_proprios:
+            prazos.salvar()
+
+    resultado = consolidar_resultados(resultados_lotes)
+    print(f"🗂️  Cache de seções: {resultado['cache']['hits']} hits / {resultado['cache']['misses']} misses")
+
+    fs_por_celula = {celula: [] for celula in celulas}
+    for i, fs in zip(resultado['indices'], resultado['fs']):
+        fs_por_celula[origem[i]].append(fs)
+
+    return {celula: fs_minimo(fs_casos) for celula, fs_casos in fs_por_celula.items()}
+
+
+def varrer(esforcos:list[tuple], diametros:list[float], quantidades:list[int], d_linha:float = 8,
+           n_processos:int|None = None, tamanho_lote:int = 100) -> DataFrame:
+    '''
+    Varredura completa de armaduras (quantidade x diâmetro) para um conjunto de casos
+
+    Returns
+    -------
+    DataFrame indexado pela quantidade de barras ('n'), uma coluna por diâmetro, com o
+    menor FS entre todos os casos (NaN se algum caso falhou)
+    '''
+    celulas = [(diametro, quantidade) for quantidade in quantidades for diametro in diametros]
+    fs = avaliar_celulas(celulas, esforcos, d_linha=d_linha, n_processos=n_processos, tamanho_lote=tamanho_lote)
+
+    tabela = pd.DataFrame(
+        np.array([[fs[(diametro, quantidade)] for diametro in diametros] for quantidade in quantidades]),
+        index=pd.Index(list(quantidades), name='n'),
+        columns=list(diametros),
+    )
+    return tabela
+
+
+def area_aco(diametro_mm:float, quantidade:int) -> float:
+    '''
+    Área total de aço (cm²) de quantidade barras de diametro_mm
+    '''
+    fi = diametro_mm / 10.0
+    return math.pi * fi**2 / 4.0 * quantidade
+
+
+def _limite_por_area(candidatos:list, avaliar, falhas:set) -> float|None:
+    '''
+    Área de aço (cm²) de um arranjo verificado (FS > 1), por bissecção sobre os candidatos ordenados por área
+
+    A bissecção supõe o FS monótono com a área, o que não vale entre diâmetros e
+    quantidades diferentes: o arranjo encontrado serve apenas de limite superior
+    para a busca por diâmetro. Uma célula que falhou (FS NaN) interrompe a
+    bissecção e vai para falhas.
+
+    Returns
+    -------
+    Área do menor candidato verificado encontrado ou None se nenhum verificar
+    '''
+    inicio, fim = 0, len(candidatos)
+    while inicio < fim:
+        meio = (inicio + fim)//2
+        fs = avaliar([candidatos[meio]])[candidatos[meio]]
+        if math.isnan(fs):
+            falhas.add(candidatos[meio])
+            break
+        if fs > 1:
+            fim = meio
+        else:
+            inicio = meio + 1
+    return area_aco(*candidatos[fim]) if fim < len(candidatos) else None
+
+
+def _buscar_por_diametro(quantidades:dict[float, list[int]], avaliar, falhas:set) -> list[tuple[float, int]]:
+    '''
+    Menor quantidade verificada (FS > 1) de cada diâmetro, com as bissecções de todos os diâmetros avançando juntas
+
+    Para um diâmetro, o FS mínimo não diminui com a quantidade de barras. Uma
+    célula que falhou (FS NaN) não indica o lado da bissecção: a busca do seu
+    diâmetro é interrompida e a célula vai para falhas.
+
+    quantidades: diâmetro → quantidades candidatas em ordem crescente
+    '''
+    # Intervalo [início, fim) de cada diâmetro, estreitado a cada rodada
+    intervalos = {d: [0, len(lista)] for d, lista in quantidades.items()}
+    while any(inicio < fim for inicio, fim in intervalos.values()):
+        rodada = {d: (inicio + fim)//2 for d, (inicio, fim) in intervalos.items() if inicio < fim}
+        fs = avaliar([(d, quantidades[d][meio]) for d, meio in rodada.items()])
+
+        for d, meio in rodada.items():
+            celula = (d, quantidades[d][meio])
+            if math.isnan(fs[celula]):
+                falhas.add(celula)
+                del intervalos[d]
+            elif fs[celula] > 1:
+                intervalos[d][1] = meio
+            else:
+                intervalos[d][0] = meio + 1
+
+    return [(d, quantidades[d][inicio]) for d, (inicio, _) in intervalos.items() if inicio < len(quantidades[d])]
+
+
+def buscar_armadura_minima(esforcos:list[tuple], diametros:list[float], quantidades:list[int], d_linha:float = 8,
+                           por_area:bool = False, n_processos:int|None = None, tamanho_lote:int = 100) -> tuple[dict|None, dict]:
+    '''
+    Busca a armadura mais leve com FS > 1 em todos os casos sem avaliar a grade inteira
+
+    Para um diâmetro, o FS mínimo não diminui com a quantidade de barras; a busca
+    faz uma bissecção por diâmetro, com as bissecções de todos os diâmetros avançando
+    juntas (uma rodada paralela por passo).
+
+    Com por_area=True, uma bissecção prévia sobre os arranjos de todos os diâmetros
+    ordenados pela área de aço encontra um arranjo verificado. Entre diâmetros e
+    quantidades diferentes o FS não é monótono com a área (a posição e o número de
+    barras mudam o FS), então esse arranjo não é necessariamente o mais leve: ele
+    apenas limita as quantidades da busca por diâmetro, que decide o resultado.
+
+    Células que falharam (FS NaN) interrompem a busca do seu diâmetro em vez de
+    serem tomadas como não verificadas; elas são relatadas e listadas em 'falhas'.
+
+    Returns
+    -------
+    Tupla com a armadura mais leve ({'diametro_mm', 'quantidade', 'area_cm2', 'fs_min', 'falhas'},
+    None se nenhuma verificar) e o FS de todas as células avaliadas (NaN nas que falharam)
+    '''
+    quantidades = sorted(quantidades)
+    avaliadas = {}
+    falhas = set()
+    workers = criar_workers(n_processos or os.cpu_count() or 1)
+    prazos = PoliticaPrazos(config)
+
+    def avaliar(celulas):
+        pendentes = [celula for celula in celulas if celula not in avaliadas]
+        if pendentes:
+            avaliadas.update(avaliar_celulas(pendentes, esforcos, d_linha=d_linha, workers=workers,
+                                             n_processos=workers.qsize(), tamanho_lote=tamanho_lote, prazos=prazos))
+        return {celula: avaliadas[celula] for celula in celulas}
+
+    try:
+        candidatas = {d: quantidades for d in diametros}
+        if por_area:
+            ordenadas = sorted(((d, n) for d in diametros for n in quantidades), key=lambda celula: area_aco(*celula))
+            limite = _limite_por_area(ordenadas, avaliar, falhas)
+            if limite is not None:
+                candidatas = {d: [n for n in quantidades if area_aco(d, n) <= limite] for d in diametros}
+        verificadas = _buscar_por_diametro(candidatas, avaliar, falhas)
+    finally:
+        encerrar_workers(workers)
+        prazos.salvar()
+
+    print(f"🔎 {len(avaliadas)} células avaliadas (grade completa: {len(diametros)*len(quantidades)})")
+    if falhas:
+        print(f"⚠️  {len(falhas)} células falharam (busca interrompida nos seus diâmetros): {sorted(falhas)}")
+
+    if not verificadas:
+        return None, avaliadas
+
+    diametro, quantidade = min(verificadas, key=lambda celula: area_aco(*celula))
+    melhor = {
+        'diametro_mm': diametro,
+        'quantidade': quantidade,
+        'area_cm2': area_aco(diametro, quantidade),
+        'fs_min': avaliadas[(diametro, quantidade)],
+        'falhas': sorted(falhas),
+    }
+    return melhor, avaliadas
+
+
+def salvar_dim(tabela:DataFrame, path:str) -> str:
+    '''
+    Escreve a tabela da varredura em DIM-<nome do excel de entrada>.xlsx
+    '''
+    nome = path.replace('.xlsx', '').split('\\')[-1]
+    arquivo = f'DIM-{nome}.xlsx'
+    tabela.to_excel(arquivo)
+    return arquivo
@@ -0,0 +1,85 @@
+import time
+import threading
+
+
+class Vigia:
+    '''
+    Watchdog de longa duração de um engine: uma única thread que acompanha o prazo da chamada atual.
+
+    O chamador arma o prazo antes de bloquear na chamada e desarma ao retornar.
+    Se o prazo vencer antes, a thread executa a ação de expiração (ex.: matar o
+    processo do engine), o que desbloqueia o chamador. A mesma thread serve todas
+    as chamadas do engine; nenhuma thread é criada por caso.
+    '''
+
+    def __init__(self, nome:str = 'vigia'):
+        self.nome = nome
+        self.condicao = threading.Condition()
+        self.prazo = None  # instante (time.monotonic) em que a chamada atual expira
+        self.ao_expirar = None
+        self.expirou = False
+        self.encerrado = False
+        self._thread = None
+
+    def armar(self, timeout:float|None, ao_expirar):
+        '''
+        Inicia a vigilância da chamada atual; timeout=None vigia sem prazo
+        '''
+        with self.condicao:
+            if self._thread is None or not self._thread.is_alive():
+                self.encerrado = False
+                self._thread = threading.Thread(target=self._vigiar, name=self.nome, daemon=True)
+                self._thread.start()
+
+            self.prazo = None if timeout is None else time.monotonic() + timeout
+            self.ao_expirar = ao_expirar
+            self.expirou = False
+            self.condicao.notify()
+
+    def desarmar(self) -> bool:
+        '''
+        Encerra a vigilância da chamada atual
+
+        Returns
+        -------
+        Se o prazo venceu (e a ação de expiração foi executada)
+        '''
+        with self.condicao:
+            self.prazo = None
+            self.ao_expirar = None
+            self.condicao.notify()
+            return self.expirou
+
+    def encerrar(self):
+        '''
+        Para a thread do watchdog
+        '''
+        with self.condicao:
+            self.encerrado = True
+            self.prazo = None
+            self.condicao.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _vigiar(self):
+        with self.condicao:
+            while not self.encerrado:
+                if self.prazo is None:
+                    self.condicao.wait()
+                    continue
+
+                restante = self.prazo - time.monotonic()
+                if restante > 0:
+                    self.condicao.wait(timeout=restante)
+                    continue
+
+                ao_expirar = self.ao_expirar
+                self.prazo = None
+                self.ao_expirar = None
+                self.expirou = True
+                if ao_expirar is not None:
+                    try:
+                        ao_expirar()
+                    except Exception as e:
+                        print(f"    ERRO no {self.nome}: {e}", flush=True)
@@ -8,10 +8,93 @@ Inclui:
 import jpype
 import jpype.imports
 from typing import List, Dict, Any, Tuple, Optional
+from collections import OrderedDict
+from functools import lru_cache
 import json
 import math
 import os
+import numpy as np
 import yaml
+from utils.chaves import chave_secao
+
+
+# Colunas dos arrays devolvidos pelo _extrair_envoltoria
+COLUNAS_CURVA_MR = ('nrd_tf', 'teta_rad', 'mx_tfm', 'my_tfm')
+COLUNAS_ENVOLTORIA = ('nrd_tf', 'mrd_tfm')
+COLUNAS_BARRAS = ('x_cm', 'y_cm', 'area_cm2', 'diametro_cm')
+
+# Níveis de detalhe do calcular_envoltoria: o que é extraído da JVM
+DETALHES = ('fs', 'fs+curva', 'completo')
+
+
+def _array_java(valores) -> np.ndarray:
+    """
+    Converte um double[] Java em array NumPy em uma única chamada (protocolo de buffer do JPype)
+    """
+    return np.asarray(valores, dtype=float)
+
+
+def _linhas_java(lista, n_colunas: int) -> np.ndarray:
+    """
+    Empilha uma lista Java de double[] em um array NumPy (uma conversão por linha)
+    """
+    if not lista or lista.size() == 0:
+        return np.empty((0, n_colunas))
+    return np.vstack([_array_java(lista.get(i))[:n_colunas] for i in range(lista.size())])
+
+
+@lru_cache(maxsize=256)
+def posicoes_retangular(hx: float, hy: float, diametro_mm: float, nx: int, ny: int, d_linha: float) -> np.ndarray:
+    """
+    Disposição das barras da seção retangular: base, laterais (esquerda/direita alternadas) e topo
+
+    Returns:
+        Array (n_barras, 4) com x_cm, y_cm, area_cm2, diametro_cm (memoizado por seção e armadura)
+    """
+    fi = diametro_mm / 10.0  # Converte mm para cm
+    asfi = math.pi * fi**2 / 4.0  # Área de uma barra
+
+    x = d_linha + (hx - 2.0 * d_linha) / (nx - 1) * np.arange(nx)
+    base = np.column_stack((x, np.full(nx, d_linha)))
+    topo = np.column_stack((x, np.full(nx, hy - d_linha)))
+
+    # Barras nas laterais (intermediárias), lado esquerdo e direito alternados
+    laterais = np.empty((2 * max(ny - 2, 0), 2))
+    if ny > 2:
+        y = d_linha + (hy - 2.0 * d_linha) / (ny - 1) * np.arange(1, ny - 1)
+        laterais[0::2, 0] = d_linha
+        laterais[1::2, 0] = hx - d_linha
+        laterais[0::2, 1] = y
+        laterais[1::2, 1] = y
+
+    coordenadas = np.vstack((base, laterais, topo))
+    return np.column_stack((coordenadas, np.full(len(coordenadas), asfi), np.full(len(coordenadas), fi)))
+
+
+@lru_cache(maxsize=256)
+def posicoes_circular(diametro_secao: float, diametro_mm: float, n_barras: int, d_linha: float) -> np.ndarray:
+    """
+    Disposição das barras da seção circular, distribuídas no perímetro a partir de teta = 0
+
+    Returns:
+        Array (n_barras, 4) com x_cm, y_cm, area_cm2, diametro_cm (memoizado por seção e armadura)
+    """
+    fi = diametro_mm / 10.0
+    asfi = math.pi * fi**2 / 4.0
+    ri = diametro_secao/2.0 - d_linha  # Raio até CG das barras
+
+    teta = np.arange(n_barras) * 2 * math.pi / n_barras
+    return np.column_stack((ri*np.cos(teta), ri*np.sin(teta), np.full(n_barras, asfi), np.full(n_barras, fi)))
+
+
+def _lista_barras_java(posicoes: np.ndarray) -> Any:
+    """
+    Entrega a disposição das barras ao Java de uma vez: double[][] via buffer e ArrayList<double[]>
+    """
+    from java.util import ArrayList, Arrays
+
+    matriz = jpype.JArray.of(np.ascontiguousarray(posicoes, dtype=float))
+    return ArrayList(Arrays.asList(matriz))
 
 
 class PCalcEngine:
@@ -44,13 +127,14 @@ class PCalcEngine:
         # Retorna armadura dimensionada
     """
     
-    def __init__(self, jar_path: str, jvm_path: Optional[str] = None):
+    def __init__(self, jar_path: str, jvm_path: Optional[str] = None, tamanho_cache: int = 16):
         """
         Inicializa o wrapper e carrega o JAR do pcalc
         
         Args:
             jar_path: Caminho para o arquivo .jar do pcalc
             jvm_path: (Opcional) Caminho para a JVM específica
+            tamanho_cache: Quantidade máxima de seções discretizadas mantidas em cache (0 desativa)
         """
         self.jar_path = jar_path
         with open('config.yaml', 'r') as file:
@@ -85,14 +169,41 @@ class PCalcEngine:
         self.CalculaFsMomentoMin = jpype.JClass('pcalc.CalculaFsMomentoMin')   
         self.alphaB = jpype.JClass('pcalc.calcula.AlphaB') 
         self.ELS = jpype.JClass('pcalc.ELS')   
-        self.dados = self.Dados()
+        self.dados = self._novo_dados()
 
-        # Configurar o básico 
-        self._configurar_materiais(self.dados)
-        self._configurar_parametros(self.dados)
-        self._configurar_disposicao(self.dados)
+        # Cache LRU de seções discretizadas: chave da seção -> {'dados', 'niveis_n'}
+        self.tamanho_cache = tamanho_cache
+        self._cache_secoes = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
         
 
+    def _novo_dados(self) -> Any:
+        """Cria um objeto Dados com materiais, parâmetros e disposição configurados"""
+        dados = self.Dados()
+
+        # Configurar o básico 
+        self._configurar_materiais(dados)
+        self._configurar_parametros(dados)
+        self._configurar_disposicao(dados)
+        return dados
+
+
+    def estatisticas_cache(self) -> Dict[str, Any]:
+        """Retorna os contadores de acerto do cache de seções"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'secoes_em_cache': len(self._cache_secoes),
+            'taxa_acerto': self.cache_hits/total if total else 0.0
+        }
+
+
+    def limpar_cache(self):
+        """Descarta as seções em cache"""
+        self._cache_secoes.clear()
+
 
     def _configurar_disposicao(self, dados):
         dados.secao.setL(self.config['elemento']['L'])
@@ -232,57 +343,17 @@ class PCalcEngine:
             ny: Número de barras no lado vertical
             d_linha: Distância do CG da barra à face (cm)
         """
-        from java.util import ArrayList
-        
         hx = dados.secao.getHx()
         hy = dados.secao.getHy()
         fi = diametro_mm / 10.0  # Converte mm para cm
         asfi = math.pi * fi**2 / 4.0  # Área de uma barra
         
-        lista_as = ArrayList()
-        
-        # Barras na base (y = d_linha)
-        for i in range(nx):
-            barra = jpype.JArray(jpype.JDouble)(4)
-            barra[0] = d_linha + (hx - 2.0 * d_linha) / (nx - 1) * i
-            barra[1] = d_linha
-            barra[2] = asfi
-            barra[3] = fi
-            lista_as.add(barra)
-        
-        # Barras nas laterais (intermediárias)
-        for i in range(1, ny - 1):
-            # Lado esquerdo
-            barra_esq = jpype.JArray(jpype.JDouble)(4)
-            barra_esq[0] = d_linha
-            barra_esq[1] = d_linha + (hy - 2.0 * d_linha) / (ny - 1) * i
-            barra_esq[2] = asfi
-            barra_esq[3] = fi
-            lista_as.add(barra_esq)
-            
-            # Lado direito
-            barra_dir = jpype.JArray(jpype.JDouble)(4)
-            barra_dir[0] = hx - d_linha
-            barra_dir[1] = d_linha + (hy - 2.0 * d_linha) / (ny - 1) * i
-            barra_dir[2] = asfi
-            barra_dir[3] = fi
-            lista_as.add(barra_dir)
-        
-        # Barras no topo (y = hy - d_linha)
-        for i in range(nx):
-            barra = jpype.JArray(jpype.JDouble)(4)
-            barra[0] = d_linha + (hx - 2.0 * d_linha) / (nx - 1) * i
-            barra[1] = hy - d_linha
-            barra[2] = asfi
-            barra[3] = fi
-            lista_as.add(barra)
-        
-        # Calcula área total
-        area_total = asfi * lista_as.size()
+        # Coordenadas vetorizadas (memoizadas) entregues ao Java de uma vez
+        posicoes = posicoes_retangular(float(hx), float(hy), diametro_mm, nx, ny, d_linha)
         
         # Configura no objeto dados
-        dados.armacao.setListaAs(lista_as)
-        dados.armacao.setAreaAs(area_total)
+        dados.armacao.setListaAs(_lista_barras_java(posicoes))
+        dados.armacao.setAreaAs(asfi * len(posicoes))
         dados.armacao.setNx(nx)
         dados.armacao.setNy(ny)
         dados.armacao.setDL(d_linha)
@@ -300,30 +371,14 @@ class PCalcEngine:
             n_barras: Número de barras distribuídas no perímetro
             d_linha: Distância do CG da barra à face (cm)
         """
-        from java.util import ArrayList
-        
         diametro_secao = dados.secao.getHx()
         fi = diametro_mm / 10.0
         asfi = math.pi * fi**2 / 4.0
-        centro_x = dados.secao.getXm()
-        centro_y = dados.secao.getYm()
         
-        lista_as = ArrayList()
-        ri = diametro_secao/2.0 - d_linha  # Raio até CG das barras
+        posicoes = posicoes_circular(float(diametro_secao), diametro_mm, n_barras, d_linha)
         
-        for i in range(n_barras):
-            teta = i * 2 * math.pi / n_barras
-            barra = jpype.JArray(jpype.JDouble)(4)
-            barra[0] = ri*math.cos(teta)
-            barra[1] = ri*math.sin(teta)
-            barra[2] = asfi
-            barra[3] = fi
-            lista_as.add(barra)
-        
-        area_total = asfi * n_barras
-        
-        dados.armacao.setListaAs(lista_as)
-        dados.armacao.setAreaAs(area_total)
+        dados.armacao.setListaAs(_lista_barras_java(posicoes))
+        dados.armacao.setAreaAs(asfi * n_barras)
         dados.armacao.setNx(n_barras)
         dados.armacao.setNy(n_barras)
         dados.armacao.setDL(d_linha)
@@ -388,13 +443,79 @@ class PCalcEngine:
         dados.secao.setLambdaMax(max(lambda_x, lambda_y))
 
 
+    def _preparar_secao(self, dados: Any, diametro_mm: float, nx: int, ny: int,
+                        n_barras: Optional[int], d_linha: float):
+        """
+        Configura a seção, monta a armadura e calcula a esbeltez a partir do config
+        """
+        tipo_secao = self.config['elemento']['secao']['tipo_secao']
+        tipo_vinculacao = self.config['elemento']['vinculacao']
+        hx = self.config['elemento']['dim_x']
+        hy = self.config['elemento']['dim_y']
+        interno = self.config['elemento']['hole']
+        diametro = self.config['elemento']['dim_x'] 
+
+        # Configura seção
+        if "retangular" in tipo_secao.lower():
+            self.configurar_secao_retangular(dados, hx, hy, tipo_vinculacao)
+            # Monta armadura retangular
+            self._montar_armadura_retangular(dados, diametro_mm, nx, ny, d_linha)
+        elif "circular" in tipo_secao.lower():
+            # Dados gerais
+            diam = diametro if diametro else hx # Diâmetro da barra
+            n_barras_calc = n_barras if n_barras else nx # Quantidade de barras 
+            # Selecionando se a seção é vazada
+            if "vazada" in tipo_secao.lower():
+                self.configurar_secao_circular_vazada(dados, diam, tipo_vinculacao, interno=interno)
+            else:
+                self.configurar_secao_circular(dados, diam, tipo_vinculacao)
+
+            # Monta armadura circular
+            self._montar_armadura_circular(dados, diametro_mm, n_barras_calc, d_linha)
+        else:
+            raise ValueError(f"Tipo de seção '{tipo_secao}' não suportado")
+        
+        self._esbeltez(dados)
+
+
+    def _secao_em_cache(self, diametro_mm: float, nx: int, ny: int,
+                        n_barras: Optional[int], d_linha: float) -> Dict[str, Any]:
+        """
+        Retorna a seção discretizada do cache LRU, montando e discretizando em caso de falta
+        
+        Returns:
+            Dicionário com o objeto Dados ('dados') e os níveis de N da última CurvaMr ('niveis_n')
+        """
+        chave = chave_secao(self.config, diametro_mm, nx, ny, n_barras, d_linha)
+
+        entrada = self._cache_secoes.get(chave)
+        if entrada is not None:
+            self.cache_hits += 1
+            self._cache_secoes.move_to_end(chave)
+            return entrada
+
+        self.cache_misses += 1
+        dados = self._novo_dados()
+        self._preparar_secao(dados, diametro_mm, nx, ny, n_barras, d_linha)
+        self.DiscretizaSecao(dados)
+        entrada = {'dados': dados, 'niveis_n': None}
+
+        if self.tamanho_cache > 0:
+            self._cache_secoes[chave] = entrada
+            if len(self._cache_secoes) > self.tamanho_cache:
+                self._cache_secoes.popitem(last=False)
+
+        return entrada
+
+
     def calcular_envoltoria(self,
                            diametro_mm: float = 12.5,
                            nx: int = 3,
                            ny: int = 3,
                            n_barras: Optional[int] = None,
                            d_linha: float = 3.5,
-                           esforcos: Optional[List[Tuple[float, float, float, float, float]]] = None) -> Dict[str, Any]:
+                           esforcos: Optional[List[Tuple[float, float, float, float, float]]] = None,
+                           detalhe: str = 'completo') -> Dict[str, Any]:
         """
         Calcula a envoltória de resistência com armadura pré-definida
         
@@ -408,6 +529,8 @@ class PCalcEngine:
             ny: Número de barras no lado vertical (retangular)
             n_barras: Número de barras (circular)
             d_linha: Distância do CG da barra à face externa (cm)
+            detalhe: Dados extraídos do resultado: 'fs' (apenas FS), 'fs+curva'
+                (FS e curvas Mr) ou 'completo' (também armadura e envoltórias Nrd-Mrd)
             interno: ângulo interno vazado
             L: Comprimento da barra
             tipo_vinculacao: 0=secao-unica, 1=Bi-rotulado, 2=Engaste-livre
@@ -427,40 +550,16 @@ class PCalcEngine:
             ...     ny=3,
             ...     d_linha=3.5
             ... )
-            >>> pontos_x = resultado['envoltoria_nrd_mrdx']
+            >>> pontos_x = resultado['envoltoria_nrd_mrdx']  # array (n, 2): Nrd, Mrd
             >>> pontos_y = resultado['envoltoria_nrd_mrdy']
         """
         
-        dados = self.dados
-        tipo_secao = self.config['elemento']['secao']['tipo_secao']
-        tipo_vinculacao = self.config['elemento']['vinculacao']
-        hx = self.config['elemento']['dim_x']
-        hy = self.config['elemento']['dim_y']
-        interno = self.config['elemento']['hole']
-        diametro = self.config['elemento']['dim_x'] 
-
-        # Configura seção
-        if "retangular" in tipo_secao.lower():
-            self.configurar_secao_retangular(dados, hx, hy, tipo_vinculacao)
-            # Monta armadura retangular
-            self._montar_armadura_retangular(dados, diametro_mm, nx, ny, d_linha)
-        elif "circular" in tipo_secao.lower():
-            # Dados gerais
-            diam = diametro if diametro else hx # Diâmetro da barra
-            n_barras_calc = n_barras if n_barras else nx # Quantidade de barras 
-            # Selecionando se a seção é vazada
-            if "vazada" in tipo_secao.lower():
-                self.configurar_secao_circular_vazada(dados, diam, tipo_vinculacao, interno=interno)
-            else:
-                self.configurar_secao_circular(dados, diam, tipo_vinculacao)
-
-            # Monta armadura circular
-            self._montar_armadura_circular(dados, diametro_mm, n_barras_calc, d_linha)
-        else:
-            raise ValueError(f"Tipo de seção '{tipo_secao}' não suportado")
-        
-        self._esbeltez(self.dados)
+        if detalhe not in DETALHES:
+            raise ValueError(f"detalhe deve ser um de {DETALHES}, recebido: {detalhe!r}")
 
+        entrada = self._secao_em_cache(diametro_mm, nx, ny, n_barras, d_linha)
+        dados = entrada['dados']
+        self.dados = dados
 
         if esforcos:
             print(esforcos)
@@ -468,14 +567,18 @@ class PCalcEngine:
             n_comb = len(esforcos)
         else:
             # Esforço dummy para inicializar
-            self.adicionar_esforcos(dados, [(0, 0, 0, 0, 0)])
+            esforcos_dummy = [(0, 0, 0, 0, 0)]
+            self.adicionar_esforcos(dados, esforcos_dummy)
             n_comb = 1
 
         dados.erros.iniciarErros(n_comb)
         
         # CALCULA ENVOLTÓRIA (sequência do método verifica())
-        self.DiscretizaSecao(dados)
-        self.CurvaMr(dados)
+        # As curvas Mr dependem apenas da seção e dos níveis de N das combinações
+        niveis_n = tuple(float(el[0]) for el in (esforcos or esforcos_dummy))
+        if entrada['niveis_n'] != niveis_n:
+            self.CurvaMr(dados)
+            entrada['niveis_n'] = niveis_n
        
         # SE tiver esforços, calcula FS também
         if esforcos:
@@ -484,101 +587,56 @@ class PCalcEngine:
             self.CalculaFs(dados)
             self.CalculaFsMomentoMin(dados) 
 
-        return self._extrair_envoltoria(dados)
+        return self._extrair_envoltoria(dados, detalhe)
     
 
-    def _extrair_envoltoria(self, dados: Any) -> Dict[str, Any]:
+    def _extrair_envoltoria(self, dados: Any, detalhe: str = 'completo') -> Dict[str, Any]:
         """
         Extrai os dados da envoltória calculada
         
+        Cada double[] Java é convertido em NumPy em uma única chamada; curvas e
+        barras são devolvidas como arrays compactos (colunas em COLUNAS_*).
+        Apenas os dados do nível de detalhe pedido atravessam a JVM.
+        
         Args:
             dados: Objeto Dados com resultados
+            detalhe: 'fs', 'fs+curva' ou 'completo'
             
         Returns:
-            Dicionário com pontos da envoltória e informações da armadura
-        """
-        resultado = {
-            'sucesso': True,
-            'armadura': {},
-            'envoltoria_nrd_mrdx': [],
-            'envoltoria_nrd_mrdy': [],
-            'curvas_mr': []
-        }
-        
-        # Informações da armadura
-        lista_as = dados.armacao.getAs()
-        armadura_info = {
-            'diametro_mm': dados.armacao.getFi() * 10.0,
-            'area_total_cm2': dados.armacao.getAreaAs(),
-            'n_barras': lista_as.size(),
-            'nx': dados.armacao.getNx(),
-            'ny': dados.armacao.getNy(),
-            'd_linha_cm': dados.armacao.getDL(),
-            'posicoes': []
-        }
-        
-        for barra in lista_as:
-            armadura_info['posicoes'].append({
-                'x_cm': float(barra[0]),
-                'y_cm': float(barra[1]),
-                'area_cm2': float(barra[2]),
-                'diametro_cm': float(barra[3])
-            })
-        
-        resultado['armadura'] = armadura_info
-        
-        # Extrai envoltória Nrd x Mrdx
-        curvas_nrd_mrdx = dados.resultados.getCurvasNrdMrdx()
-        #print(f"DEBUG: tipo = {type(curvas_nrd_mrdx)}")
-        #print(f"DEBUG: tamanho = {curvas_nrd_mrdx.size() if hasattr(curvas_nrd_mrdx, 'size') else len(curvas_nrd_mrdx)}")
-        if curvas_nrd_mrdx and curvas_nrd_mrdx.size() > 0:
-            pontos_x = []
-            for i in range(curvas_nrd_mrdx.size()):
-                        ponto = curvas_nrd_mrdx.get(i)  # ponto = [Nrd, Mrd]
-                        pontos_x.append({
-                            'nrd_tf': float(ponto[0]),
-                            'mrd_tfm': float(ponto[1])
-                        })
-            resultado['envoltoria_nrd_mrdx'] = pontos_x
-      
-        # Extrai envoltória Nrd x Mrdy
-        curvas_nrd_mrdy = dados.resultados.getCurvasNrdMrdy()
-        if curvas_nrd_mrdy and curvas_nrd_mrdy.size() > 0:
-            pontos_y = []
-            for i in range(curvas_nrd_mrdy.size()):
-                curva_y = curvas_nrd_mrdy.get(i)
-                pontos_y.append({
-                    'nrd_tf': float(ponto[0]),
-                    'mrd_tfm': float(ponto[1])
-                })
-            resultado['envoltoria_nrd_mrdy'] = pontos_y
-        
-        # Extrai curvas Mr completas (N, teta, Mx, My)
-        curvas_mr = dados.resultados.getCurvasMr()
-        if curvas_mr and curvas_mr.size() > 0:
-            curva = curvas_mr.get(0)
-            pontos_mr = []
-            
-            n_pontos = len(curva[0])
-            for i in range(n_pontos):
-                pontos_mr.append({
-                    'nrd_tf': float(curva[0][i]),
-                    'teta_rad': float(curva[1][i]),
-                    'mx_tfm': float(curva[3][i]),
-                    'my_tfm': float(curva[2][i])
-                })
+            Dicionário com os FS e, conforme o detalhe, curvas Mr, envoltórias e armadura
+        """
+        resultado = {'sucesso': True}
+        
+        if detalhe == 'completo':
+            # Informações da armadura (posições: x_cm, y_cm, area_cm2, diametro_cm)
+            lista_as = dados.armacao.getAs()
+            resultado['armadura'] = {
+                'diametro_mm': dados.armacao.getFi() * 10.0,
+                'area_total_cm2': dados.armacao.getAreaAs(),
+                'n_barras': lista_as.size(),
+                'nx': dados.armacao.getNx(),
+                'ny': dados.armacao.getNy(),
+                'd_linha_cm': dados.armacao.getDL(),
+                'posicoes': _linhas_java(lista_as, len(COLUNAS_BARRAS))
+            }
             
-            resultado['curvas_mr'] = pontos_mr
+            # Envoltórias Nrd x Mrdx e Nrd x Mrdy (nrd_tf, mrd_tfm)
+            resultado['envoltoria_nrd_mrdx'] = _linhas_java(dados.resultados.getCurvasNrdMrdx(), len(COLUNAS_ENVOLTORIA))
+            resultado['envoltoria_nrd_mrdy'] = _linhas_java(dados.resultados.getCurvasNrdMrdy(), len(COLUNAS_ENVOLTORIA))
+        
+        if detalhe in ('fs+curva', 'completo'):
+            # Curvas Mr completas de todas as combinações (uma por nível de N no cálculo em bloco)
+            resultado['curvas_mr_por_combinacao'] = self._extrair_curvas_mr(dados)
+            resultado['curvas_mr'] = (resultado['curvas_mr_por_combinacao'][0] if resultado['curvas_mr_por_combinacao']
+                                      else np.empty((0, len(COLUNAS_CURVA_MR))))
+
         # Pega FS de cada combinação
         try:
             esforcos_obj = dados.resultados.getesforcos()
             if esforcos_obj:
                 
                 list_fs = esforcos_obj[5]  # índice 5 = lista de FS
-                resultado['fs_por_combinacao'] = []
-                for i in range(list_fs.size()):
-                    fs_comb = list_fs.get(i)
-                    resultado['fs_por_combinacao'].append([float(x) for x in fs_comb])
+                resultado['fs_por_combinacao'] = [_array_java(list_fs.get(i)).tolist() for i in range(list_fs.size())]
             
             resultado['fs_min'] = float(dados.resultados.getFsMin())
             resultado['comb_fs_min'] = int(dados.resultados.getCombFsMin())
@@ -588,6 +646,49 @@ class PCalcEngine:
         return resultado
     
 
+    def _extrair_curvas_mr(self, dados: Any) -> List[np.ndarray]:
+        """
+        Curvas Mr calculadas (uma por nível de N), como arrays (n, 4) nas COLUNAS_CURVA_MR
+        """
+        # No Java: curva[0]=N, curva[1]=teta, curva[2]=My, curva[3]=Mx
+        curvas_mr = dados.resultados.getCurvasMr()
+        if not curvas_mr or curvas_mr.size() == 0:
+            return []
+        return [np.column_stack([_array_java(curvas_mr.get(j)[k]) for k in (0, 1, 3, 2)]) for j in range(curvas_mr.size())]
+
+
+    def calcular_curvas_mr(self,
+                           niveis_n: List[float],
+                           diametro_mm: float = 12.5,
+                           nx: int = 3,
+                           ny: int = 3,
+                           n_barras: Optional[int] = None,
+                           d_linha: float = 3.5) -> List[np.ndarray]:
+        """
+        Calcula apenas as curvas Mr da seção armada nos níveis de N pedidos
+
+        Executa somente a CurvaMr, sem CalculaMomCurv/CalculaEsforcos/FS (sem 2ª ordem).
+        
+        Args:
+            niveis_n: Níveis de esforço normal (tf)
+            diametro_mm, nx, ny, n_barras, d_linha: armadura, como no calcular_envoltoria
+            
+        Returns:
+            Lista com uma curva (array (n, 4) nas COLUNAS_CURVA_MR) por nível de N
+        """
+        entrada = self._secao_em_cache(diametro_mm, nx, ny, n_barras, d_linha)
+        dados = entrada['dados']
+        self.dados = dados
+
+        niveis_n = tuple(float(n) for n in niveis_n)
+        self.adicionar_esforcos(dados, [(n, 0, 0, 0, 0) for n in niveis_n])
+        dados.erros.iniciarErros(len(niveis_n))
+
+        self.CurvaMr(dados)
+        entrada['niveis_n'] = niveis_n
+        return self._extrair_curvas_mr(dados)
+
+
     def debug_completo_2ord(self, dados):
         """
         Coleta TODOS os dados intermediários do cálculo de 2ª ordem
@@ -873,6 +974,13 @@ class PCalcEngine:
         resultados['comb_fs_min'] = int(dados.resultados.getCombFsMin())
         resultados['fs_min_momento'] = float(dados.resultados.getFsMi())
         
+        resultados['erros'] = self._listar_erros(dados)
+        
+        return resultados
+
+    def _listar_erros(self, dados: Any) -> List[Dict[str, Any]]:
+        """Listas de erro do engine (Nrd, 2ª ordem e momento mínimo) das combinações que tiveram erro"""
+        erros = []
         n_comb = dados.esforcos.getNComb()
         for i in range(n_comb):
             erro_nrd = dados.erros.getListaErroNrd(i)
@@ -880,21 +988,27 @@ class PCalcEngine:
             erro_mmin = dados.erros.getLista2OrdMmin(i)
             
             if erro_nrd or erro_2ord or erro_mmin:
-                resultados['erros'].append({
+                erros.append({
                     'combinacao': i,
                     'erro_nrd': str(erro_nrd) if erro_nrd else None,
                     'erro_2ord': str(erro_2ord) if erro_2ord else None,
                     'erro_mmin': str(erro_mmin) if erro_mmin else None
                 })
-        
-        return resultados
+        return erros
+
+    def erros_ultimo_calculo(self) -> List[Dict[str, Any]]:
+        """Listas de erro do engine do último calcular_envoltoria (vazia se nada foi calculado)"""
+        dados = getattr(self, 'dados', None)
+        if dados is None:
+            return []
+        return self._listar_erros(dados)
     
 
 
 def salvar_resultados_json(resultados: List[Dict], arquivo: str):
     """Salva resultados em arquivo JSON"""
     with open(arquivo, 'w', encoding='utf-8') as f:
-        json.dump(resultados, f, indent=2, ensure_ascii=False)
+        json.dump(resultados, f, indent=2, ensure_ascii=False, default=lambda valor: valor.tolist() if isinstance(valor, np.ndarray) else str(valor))
     print(f"Resultados salvos em: {arquivo}")
 
 
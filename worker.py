@@ -1,9 +1,11 @@
 import sys
 import json
 import time
-from threading import Thread
-from utils.wapper import PCalcEngine
-from utils.misc import matar_todos_java
+from collections import deque
+from utils.engine_processo import EngineProcesso
+from utils.blocos import TAMANHO_BLOCO, dividir_em_blocos, dividir_bloco, calcular_bloco, bloco_valido
+from utils.protocolo import enviar_mensagem, receber_mensagem
+from utils.prazos import TIMEOUT_CASO, REINICIO, timeouts_repeticao
 
 # FORCE UTF-8 encoding
 if sys.platform == 'win32':
@@ -11,67 +13,123 @@ if sys.platform == 'win32':
     sys.stderr.reconfigure(encoding='utf-8')
 
 
+ARMADURA = {'diametro_mm': 25, 'd_linha': 8, 'n_barras': 10}  # Armadura dos lotes que não informam a sua
+FATORES_REPETICAO = (2, 6, 20)  # Timeouts crescentes da repetição de falhas, em prazos por caso
+TIMEOUTS_REPETICAO = timeouts_repeticao(TIMEOUT_CASO, FATORES_REPETICAO)  # (s)
 
-def processar_lote(lote_data):
+# Engine do processo (mantido entre lotes no modo residente)
+_engine = None
+
+
+def acumular_cache(total, engine, base):
+    """
+    Soma ao total do lote os contadores do cache de seções do engine desde base
+    """
+    estatisticas = engine.estatisticas_cache()
+    total['hits'] += estatisticas['hits'] - base['hits']
+    total['misses'] += estatisticas['misses'] - base['misses']
+
+
+def obter_engine(jar_path=r"engine/pcalc.jar"):
+    """
+    Retorna o engine do processo, inicializando-o se necessário
+
+    A JVM roda em um processo filho próprio, de modo que um travamento mata
+    apenas o engine deste worker.
+    """
+    global _engine
+    if _engine is None:
+        print("Inicializando engine...")
+        _engine = EngineProcesso(jar_path=jar_path)
+    return _engine
+
+
+def encerrar_engine():
+    """
+    Destrói o engine do processo
+    """
+    global _engine
+    if _engine is not None:
+        _engine.encerrar()
+    _engine = None
+
+
+def processar_lote(lote_data, tamanho_bloco=TAMANHO_BLOCO, manter_engine=False, engine=None):
     """
-    Processa um lote de cálculos com lógica robusta de thread + timeout
+    Processa um lote de cálculos em blocos de combinações com timeout rígido por bloco
+
+    Cada bloco é calculado em uma única chamada ao engine. Se o bloco falhar ou travar,
+    apenas ele é dividido ao meio e recalculado, até isolar a combinação problemática.
+
+    manter_engine: reaproveita o engine entre lotes (modo residente) em vez de destruí-lo no final
+    engine: engine do chamador (ex.: ClienteEngine de um PoolEngines), usado no lugar do
+    engine do processo e nunca destruído aqui
+
+    O timeout de cada bloco é lote_data['timeout_caso'] (ou TIMEOUT_CASO) por combinação.
+    O resultado traz em 'latencias' o tempo por caso dos blocos concluídos (None nos
+    casos que falharam), usado pela PoliticaPrazos.
+
+    lote_data['prazo'] (opcional) é o prazo (s) do lote no orquestrador: um bloco que não
+    cabe no tempo restante não é calculado e os seus casos falham, em vez de o
+    orquestrador matar o worker e perder o lote inteiro.
     """
     sucessos = []
     falhas = []
-    fs = []
-    falhas_consecutivas = 0
+    fs_por_indice = {}
+    tempo_por_indice = {}  # Tempo de engine de cada caso, incluindo tentativas que falharam
+    latencia_por_indice = {}  # Tempo por caso do bloco em que o caso foi concluído
+    cache = {'hits': 0, 'misses': 0}
     
-    # Inicializa engine
-    print("Inicializando engine...")
-    engine = PCalcEngine(jar_path=r"engine/pcalc.jar")
+    # Inicializa engine (ou reaproveita o do processo)
+    engine_proprio = engine is None
+    if engine_proprio:
+        engine = obter_engine()
+    base_cache = engine.estatisticas_cache()
     
     esforcos = lote_data['esforcos']
     indices = lote_data['indices']
+    armadura = lote_data.get('armadura', ARMADURA)
+    timeout_caso = lote_data.get('timeout_caso', TIMEOUT_CASO)
+    limite = time.time() + lote_data['prazo'] if lote_data.get('prazo') else None
     
-    for idx, (i, el) in enumerate(zip(indices, esforcos)):
-        print(f"  [{idx+1}/{len(esforcos)}] Cálculo {i}...", end=' ', flush=True)
-        
-        resultado_container = [None]
-        thread_travou = False
-        
-        def executar():
-            try:
-                resultado_container[0] = engine.calcular_envoltoria(
-                    diametro_mm=25,
-                    d_linha=8,
-                    n_barras=10,
-                    esforcos=[el]
-                )
-            except Exception as e:
-                print(f"\n    ERRO na thread: {e}")
-                resultado_container[0] = None
-        
-        # Executa em thread com timeout
-        thread = Thread(target=executar)
-        thread.daemon = True
-        inicio = time.time()
-        thread.start()
-        thread.join(timeout=5.0)  # 30 segundos de timeout
-        tempo_decorrido = time.time() - inicio
-        
-        resultado = resultado_container[0]
+    # Blocos pendentes (índices, esforços) na ordem original
+    pendentes = deque(dividir_em_blocos(indices, esforcos, tamanho_bloco))
+    
+    while pendentes:
+        bloco_indices, bloco_esforcos = pendentes.popleft()
+        print(f"  Cálculos {bloco_indices[0]} a {bloco_indices[-1]} ({len(bloco_indices)})...", end=' ', flush=True)
+
+        # O bloco (e um reinício do engine) não cabe mais no prazo do lote
+        if limite is not None and time.time() + timeout_caso*len(bloco_esforcos) + REINICIO > limite:
+            print("✗ SEM PRAZO")
+            for i in bloco_indices:
+                fs_por_indice[i] = ['falhou']*11
+                tempo_por_indice.setdefault(i, 0.0)
+                falhas.append(i)
+            continue
         
-        # Verifica se travou
-        if thread.is_alive():
-            thread_travou = True
+        # A inicialização da JVM (após um reinício) não entra no tempo dos casos
+        resultado, travou, tempo_decorrido = calcular_bloco(
+            engine, bloco_esforcos, timeout_caso,
+            detalhe='fs',  # o lote usa apenas os FS
+            **armadura
+        )
+        for i in bloco_indices:
+            tempo_por_indice[i] = tempo_por_indice.get(i, 0.0) + tempo_decorrido/len(bloco_indices)
         
         # Processa resultado
-        if resultado and resultado.get('sucesso') and not thread_travou:
+        if bloco_valido(resultado, travou, len(bloco_esforcos)):
             mensagem = f"✓ OK ({tempo_decorrido:.1f}s)"
             print(mensagem)
             
-            fs.append(resultado['fs_por_combinacao'][0])
-            sucessos.append(i)
-            falhas_consecutivas = 0
+            for i, fs in zip(bloco_indices, resultado['fs_por_combinacao']):
+                fs_por_indice[i] = fs
+                latencia_por_indice[i] = tempo_decorrido/len(bloco_indices)
+                sucessos.append(i)
             
         else:
             # Determina tipo de falha
-            if thread_travou:
+            if travou:
                 tipo_falha = "TRAVOU (timeout)"
             elif resultado is None:
                 tipo_falha = "ERRO"
@@ -81,51 +139,121 @@ def processar_lote(lote_data):
             mensagem = f"✗ {tipo_falha} ({tempo_decorrido:.1f}s)"
             print(mensagem)
             
-            fs.append(['falhou']*11)
-            falhas.append(i)
-            falhas_consecutivas += 1
-            
-            # REINICIALIZA O ENGINE após cada falha
-            print("    → Destruindo engine...", flush=True)
-            try:
-                del engine
-            except:
-                pass
-            
-            print("    → Matando processos Java...", flush=True)
-            matar_todos_java()
-            
-            print("    → Reinicializando engine...", flush=True)
-
-            engine = PCalcEngine(jar_path="pcalc.jar")
-            
-            # Se muitas falhas consecutivas, pausa maior
-            if falhas_consecutivas >= 3:
-                print("    → Muitas falhas consecutivas, pausando 5s...")
-                time.sleep(5)
-                falhas_consecutivas = 0
+            if len(bloco_indices) > 1:
+                # Divide apenas o bloco que falhou e recoloca as metades no início da fila
+                print("    → Dividindo bloco...", flush=True)
+                pendentes.extendleft(reversed(dividir_bloco(bloco_indices, bloco_esforcos)))
             else:
-                time.sleep(0.5)
+                fs_por_indice[bloco_indices[0]] = ['falhou']*11
+                falhas.append(bloco_indices[0])
+            
+            # Reinicia apenas o processo deste engine; os engines dos outros workers seguem rodando
+            engine.reiniciar()
     
+    acumular_cache(cache, engine, base_cache)
+
     # Limpa engine no final
-    try:
-        del engine
-    except:
-        pass
-    
-    matar_todos_java()
+    if engine_proprio and not manter_engine:
+        encerrar_engine()
     
     return {
-        'fs': fs,
-        'sucessos': sucessos,
-        'falhas': falhas
+        'indices': indices,
+        'fs': [fs_por_indice[i] for i in indices],
+        'sucessos': sorted(sucessos),
+        'falhas': sorted(falhas),
+        'cache': cache,
+        'tempos': [tempo_por_indice[i] for i in indices],
+        'latencias': [latencia_por_indice.get(i) for i in indices]
     }
 
 
+def repetir_caso(esforco, armadura=ARMADURA, timeouts=TIMEOUTS_REPETICAO):
+    """
+    Recalcula isoladamente um caso que falhou: engine (JVM) próprio, um único caso, timeout crescente
+
+    Cada tentativa que falha reinicia o engine antes da próxima. Quando o engine
+    responde sem um FS válido, as listas de erro do cálculo (getListaErroNrd,
+    getLista2Ord, getLista2OrdMmin) são guardadas na tentativa.
+
+    Returns
+    -------
+    {'fs': FS das seções ou None se todas as tentativas falharam, 'tentativas': [{'timeout', 'tipo', 'mensagem', 'erros'}, ...]}
+    """
+    engine = EngineProcesso()
+    tentativas = []
+
+    try:
+        for n, timeout in enumerate(timeouts):
+            resultado, travou, mensagem = None, False, None
+            try:
+                resultado = engine.calcular_envoltoria(timeout=timeout, esforcos=[esforco], detalhe='fs', **armadura)
+            except TimeoutError:
+                travou = True
+            except RuntimeError as e:
+                mensagem = str(e)
+
+            if bloco_valido(resultado, travou, 1):
+                return {'fs': resultado['fs_por_combinacao'][0], 'tentativas': tentativas}
+
+            tentativa = {
+                'timeout': timeout,
+                'tipo': 'timeout' if travou else ('erro' if resultado is None else 'invalido'),
+                'mensagem': mensagem,
+                'erros': [],
+            }
+            if not travou:
+                # O processo do engine segue vivo: as listas de erro do último cálculo ainda estão nele
+                try:
+                    tentativa['erros'] = engine.chamar('erros_ultimo_calculo', timeout=timeout)
+                except (TimeoutError, RuntimeError):
+                    pass
+            tentativas.append(tentativa)
+
+            if n < len(timeouts) - 1:
+                engine.reiniciar()
+    finally:
+        engine.encerrar()
+
+    return {'fs': None, 'tentativas': tentativas}
+
+
+def servir(entrada, saida):
+    """
+    Modo residente: recebe lotes enquadrados pela entrada e devolve os resultados pela saída
+
+    O engine (e a JVM) é inicializado uma única vez e reaproveitado entre os lotes.
+    O worker encerra ao receber {'tipo': 'encerrar'} ou quando a entrada é fechada.
+    """
+    obter_engine()
+    enviar_mensagem(saida, {'tipo': 'pronto'})
+
+    while True:
+        mensagem = receber_mensagem(entrada)
+        if mensagem is None or mensagem.get('tipo') == 'encerrar':
+            break
+
+        try:
+            resultado = processar_lote(mensagem['lote'], manter_engine=True)
+            enviar_mensagem(saida, {'tipo': 'resultado', 'resultado': resultado})
+        except Exception as e:
+            print(f"\n ERRO no lote: {e}")
+            enviar_mensagem(saida, {'tipo': 'erro', 'mensagem': str(e)})
+
+    encerrar_engine()
+
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print("Uso: python worker.py <arquivo_lote.json>")
+        print("     python worker.py --residente")
         sys.exit(1)
+
+    if sys.argv[1] == '--residente':
+        # O stdout fica reservado ao protocolo; os logs vão para o stderr
+        saida = sys.stdout.buffer
+        sys.stdout = sys.stderr
+        servir(sys.stdin.buffer, saida)
+        sys.exit(0)
     
     lote_file = sys.argv[1]
     
@@ -147,6 +275,7 @@ if __name__ == '__main__':
         print(f"\n✓ Lote {lote_id} finalizado!")
         print(f"  Sucessos: {len(resultado['sucessos'])}")
         print(f"  Falhas: {len(resultado['falhas'])}")
+        print(f"  Cache de seções: {resultado['cache']['hits']} hits / {resultado['cache']['misses']} misses")
         
         sys.exit(0)
         
@@ -1,23 +1,29 @@
-import json
-from glob import glob
-from utils.extract import init_data
+from utils.extract import init_data, config
 from utils.output import create_xlsx
+from utils.armazem import ArmazemResultados, chave_caso
+from utils.chaves import chave_armadura
+from worker import ARMADURA
 
 
-def ordenar(txt):
-    return int(txt.split("_")[-1].replace('.json',''))
+# Recupera os FS de uma execução (mesmo interrompida) a partir do armazém de resultados
+PATH = r'excel\24.11 pilar.xlsx'
+MODELO = 'pilares'  # Nome do modelo no orquestrador: a seção armada vem da sua última execução
+esforcos, combine, frame = init_data(PATH)
+print(len(esforcos))
 
+armazem = ArmazemResultados('resultados.sqlite')
 
-fs_total = []
-for i, path in enumerate(sorted(glob('*.json'), key=ordenar)):
-    with open(path, 'r') as arquivo:
-        print(path, i)
-        [fs_total.append(el) for el in json.load(arquivo)['fs']]
+# Seção armada gravada com a execução; sem execução registrada, a armadura padrão do worker
+secao = armazem.secao_execucao(MODELO)
+if secao is None:
+    print(f'Nenhuma execução de {MODELO} no armazém: usando a armadura padrão do worker')
+    secao = chave_armadura(config, ARMADURA)
 
+chaves = [chave_caso(secao, esforco) for esforco in esforcos]
+armazenados = armazem.buscar(chaves)
+armazem.fechar()
 
-PATH = r'excel\24.11 pilar.xlsx'
-esforcos, combine, frame = init_data(PATH)
-print(len(esforcos))
+fs_total = [armazenados[chave] for chave in chaves if chave in armazenados]
 
 if len(esforcos) == len(fs_total):
     print('Dimensões Corretas!')